@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.sql import func
 
 from .database import Base
@@ -30,3 +30,8 @@ class VoiceProfile(Base):
         server_default=func.now(),
         onupdate=func.now(),
     )
+
+    # Serves the TTS "latest active profile" lookup as a single index descent.
+    __table_args__ = (
+        Index("ix_voice_profiles_active_updated", "is_active", "updated_at", "id"),
+    )
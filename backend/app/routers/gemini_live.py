@@ -6,51 +6,88 @@ No Gemini API calls happen here. This router only relays source frames to viewer
 from __future__ import annotations
 
 import asyncio
-import json
+import base64
 import logging
 import time
 
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 logger = logging.getLogger("echo-sight.live-relay")
 router = APIRouter(tags=["live-relay"])
 
-_viewer_clients: set[WebSocket] = set()
-_viewer_lock = asyncio.Lock()
+# Each viewer gets a bounded outbox drained by its own writer task, so a slow
+# viewer only loses its own frames instead of stalling the source loop.
+_viewer_clients: dict[WebSocket, asyncio.Queue[str]] = {}
 _source_lock = asyncio.Lock()
 _source_connected = False
 _source_last_seen_monotonic = 0.0
 _SOURCE_STALE_SECONDS = 45.0
 _VIEWER_SEND_TIMEOUT_SECONDS = 1.5
+_VIEWER_QUEUE_SIZE = 8
+# Sources send video as binary frames: one tag byte followed by the JPEG.
+_VIDEO_FRAME_TAG = 0x01
+# Fixed envelope around base64 preview data, which never needs JSON escaping.
+_VIDEO_PREVIEW_PREFIX = '{"type":"video_preview","data":"'
+_VIDEO_PREVIEW_SUFFIX = '"}'
 
 
-async def _broadcast_to_viewers(payload: dict) -> None:
-    raw = json.dumps(payload)
-    async with _viewer_lock:
-        viewers = list(_viewer_clients)
+def _enqueue(queue: asyncio.Queue[str], raw: str) -> None:
+    """Queue ``raw`` for a viewer, dropping its oldest message when full."""
+    try:
+        queue.put_nowait(raw)
+    except asyncio.QueueFull:
+        queue.get_nowait()
+        queue.put_nowait(raw)
 
-    async def _send_one(viewer: WebSocket) -> tuple[WebSocket, bool]:
-        try:
-            await asyncio.wait_for(viewer.send_text(raw), timeout=_VIEWER_SEND_TIMEOUT_SECONDS)
-            return viewer, True
-        except Exception:
-            return viewer, False
 
-    results = await asyncio.gather(*(_send_one(viewer) for viewer in viewers), return_exceptions=True)
+def _broadcast_to_viewers(payload: dict) -> None:
+    """Serialize ``payload`` once and hand it to every viewer's outbox."""
+    if _viewer_clients:
+        _broadcast_raw(orjson.dumps(payload).decode())
+
 
-    stale: list[WebSocket] = []
-    for result in results:
-        if isinstance(result, Exception):
-            continue
-        viewer, ok = result
-        if not ok:
-            stale.append(viewer)
+def _broadcast_raw(raw: str) -> None:
+    for queue in _viewer_clients.values():
+        _enqueue(queue, raw)
 
-    if stale:
-        async with _viewer_lock:
-            for viewer in stale:
-                _viewer_clients.discard(viewer)
-        logger.info("Dropped %d stale viewer socket(s)", len(stale))
+
+def _coalesce(batch: list[str]) -> list[str]:
+    """Drop all but the newest video preview; control messages are kept in order."""
+    latest_video = -1
+    for i, raw in enumerate(batch):
+        if raw.startswith(_VIDEO_PREVIEW_PREFIX):
+            latest_video = i
+    return [
+        raw
+        for i, raw in enumerate(batch)
+        if i == latest_video or not raw.startswith(_VIDEO_PREVIEW_PREFIX)
+    ]
+
+
+async def _viewer_writer(viewer: WebSocket, queue: asyncio.Queue[str]) -> None:
+    try:
+        while True:
+            raw = await queue.get()
+            if not queue.empty():
+                # Whatever piled up during the last send goes out as one JSON
+                # array frame; the entries are already serialized. Only the
+                # newest preview is worth showing, so stale ones are dropped.
+                batch = [raw]
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                batch = _coalesce(batch)
+                raw = batch[0] if len(batch) == 1 else "[" + ",".join(batch) + "]"
+            await asyncio.wait_for(viewer.send_text(raw), timeout=_VIEWER_SEND_TIMEOUT_SECONDS)
+    except asyncio.CancelledError:
+        raise
+    except Exception:  # WebSocketDisconnect, timeout, closed transport
+        if _viewer_clients.pop(viewer, None) is not None:
+            logger.info("Dropped stale viewer socket")
+        try:
+            await viewer.close()
+        except Exception:
+            pass
 
 
 @router.websocket("/ws/live")
@@ -60,17 +97,17 @@ async def live_relay(ws: WebSocket) -> None:
 
     if role == "viewer":
         await ws.accept()
-        async with _viewer_lock:
-            _viewer_clients.add(ws)
-
-        await ws.send_text(
-            json.dumps(
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=_VIEWER_QUEUE_SIZE)
+        queue.put_nowait(
+            orjson.dumps(
                 {
                     "type": "viewer_connected",
                     "source_connected": _source_connected,
                 }
-            )
+            ).decode()
         )
+        _viewer_clients[ws] = queue
+        writer = asyncio.create_task(_viewer_writer(ws, queue))
 
         try:
             while True:
@@ -78,8 +115,8 @@ async def live_relay(ws: WebSocket) -> None:
         except WebSocketDisconnect:
             pass
         finally:
-            async with _viewer_lock:
-                _viewer_clients.discard(ws)
+            _viewer_clients.pop(ws, None)
+            writer.cancel()
             try:
                 await ws.close()
             except Exception:
@@ -95,8 +132,8 @@ async def live_relay(ws: WebSocket) -> None:
                 logger.warning("Stale source detected (%.2fs), allowing takeover", age)
                 _source_connected = False
             else:
-                await ws.send_text(
-                    json.dumps(
+                await ws.send_bytes(
+                    orjson.dumps(
                         {
                             "type": "error",
                             "message": "A source session is already active.",
@@ -109,23 +146,35 @@ async def live_relay(ws: WebSocket) -> None:
         _source_connected = True
         _source_last_seen_monotonic = time.monotonic()
 
-    await ws.send_text(json.dumps({"type": "session_started"}))
-    await _broadcast_to_viewers({"type": "source_connected"})
+    await ws.send_bytes(orjson.dumps({"type": "session_started"}))
+    _broadcast_to_viewers({"type": "source_connected"})
 
     try:
         while True:
-            raw = await ws.receive_text()
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                break
             _source_last_seen_monotonic = time.monotonic()
 
+            frame = message.get("bytes")
+            if frame is not None:
+                if len(frame) > 1 and frame[0] == _VIDEO_FRAME_TAG and _viewer_clients:
+                    # Viewers still take base64 JSON; encode once per frame and
+                    # wrap it in the cached envelope instead of serializing.
+                    data = base64.b64encode(memoryview(frame)[1:]).decode("ascii")
+                    _broadcast_raw(_VIDEO_PREVIEW_PREFIX + data + _VIDEO_PREVIEW_SUFFIX)
+                continue
+
+            # Older sources send {"type": "video", "data": <base64>} as text.
             try:
-                msg = json.loads(raw)
-            except json.JSONDecodeError:
+                msg = orjson.loads(message.get("text") or "")
+            except orjson.JSONDecodeError:
                 continue
 
             if msg.get("type") == "video":
                 data = msg.get("data")
                 if data:
-                    await _broadcast_to_viewers({"type": "video_preview", "data": data})
+                    _broadcast_to_viewers({"type": "video_preview", "data": data})
 
     except WebSocketDisconnect:
         pass
@@ -134,7 +183,7 @@ async def live_relay(ws: WebSocket) -> None:
             _source_connected = False
             _source_last_seen_monotonic = 0.0
 
-        await _broadcast_to_viewers({"type": "source_disconnected"})
+        _broadcast_to_viewers({"type": "source_disconnected"})
         try:
             await ws.close()
         except Exception:
@@ -1,9 +1,10 @@
 """Video streaming API endpoints."""
 from __future__ import annotations
 
-import time
+import asyncio
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, WebSocket
 from fastapi.responses import StreamingResponse
 
 from ..services import frame_buffer, ws_manager
@@ -11,31 +12,85 @@ from ..services import frame_buffer, ws_manager
 router = APIRouter(prefix="/stream", tags=["stream"])
 
 
-def mjpeg_generator():
-    """Yield JPEG frames at ~30 FPS as multipart stream."""
-    interval = 1.0 / 30.0
-    waited_once = False
-    
-    while True:
-        jpg_bytes = frame_buffer.get_jpeg(quality=80)
-        if jpg_bytes is not None:
-            yield (
-                b"--frame\r\n"
-                b"Content-Type: image/jpeg\r\n\r\n" + jpg_bytes + b"\r\n"
-            )
-            waited_once = False
-        else:
-            # Wait a bit longer if no frame yet
-            if not waited_once:
-                print("[Stream] Waiting for first frame...")
-                waited_once = True
-            time.sleep(0.1)
-            continue
-        time.sleep(interval)
+STREAM_JPEG_QUALITY = 80
+# How long the producer blocks for a frame before re-checking for viewers.
+_PRODUCER_WAIT_SECONDS = 1.0
+_PRODUCER_RETRY_SECONDS = 0.1
+
+
+class LatestJpeg:
+    """Latest-only JPEG slot: one producer task encodes, every viewer reads.
+
+    The producer runs only while at least one viewer is iterating frames().
+    """
+
+    def __init__(self) -> None:
+        self.seq = 0
+        self.jpeg: Optional[bytes] = None
+        self._changed = asyncio.Condition()
+        self._viewers = 0
+        self._producer: Optional[asyncio.Task] = None
+
+    async def frames(self) -> AsyncIterator[bytes]:
+        """Yield each new JPEG once, starting with the current one."""
+        self._viewers += 1
+        if self._producer is None or self._producer.done():
+            self._producer = asyncio.create_task(self._produce())
+        last_seq = 0
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self.seq != last_seq)
+                    last_seq = self.seq
+                    jpeg = self.jpeg
+                if jpeg is not None:
+                    yield jpeg
+        finally:
+            self._viewers -= 1
+
+    async def _produce(self) -> None:
+        seq = 0
+        waited_once = False
+        while self._viewers:
+            prev = seq
+            try:
+                # Blocks on FrameBuffer's condition; one thread for all viewers.
+                seq = await asyncio.to_thread(frame_buffer.wait_for_frame, prev, _PRODUCER_WAIT_SECONDS)
+                if seq == prev:
+                    if seq == 0 and not waited_once:
+                        print("[Stream] Waiting for first frame...")
+                        waited_once = True
+                    continue
+                jpeg = await asyncio.to_thread(frame_buffer.get_jpeg, STREAM_JPEG_QUALITY)
+            except Exception as e:
+                # Viewers are parked on the condition; the producer must
+                # outlive a bad frame or they would hang.
+                print(f"[Stream] Frame encode failed: {e}")
+                await asyncio.sleep(_PRODUCER_RETRY_SECONDS)
+                continue
+
+            if jpeg is None:
+                continue
+            async with self._changed:
+                self.seq = seq
+                self.jpeg = jpeg
+                self._changed.notify_all()
+
+
+latest_jpeg = LatestJpeg()
+
+
+async def mjpeg_generator():
+    """Yield each newly captured frame once as a multipart JPEG stream."""
+    async for jpg_bytes in latest_jpeg.frames():
+        yield (
+            b"--frame\r\n"
+            b"Content-Type: image/jpeg\r\n\r\n" + jpg_bytes + b"\r\n"
+        )
 
 
 @router.get("/video")
-def video_feed():
+async def video_feed():
     """MJPEG video stream endpoint."""
     return StreamingResponse(
         mjpeg_generator(),
@@ -48,8 +103,8 @@ async def websocket_endpoint(ws: WebSocket):
     """WebSocket endpoint for real-time analysis updates."""
     await ws_manager.connect(ws)
     try:
-        while True:
-            # Keep connection alive
-            await ws.receive_text()
-    except WebSocketDisconnect:
+        # Keep connection alive; incoming messages are discarded undecoded.
+        while (await ws.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
         ws_manager.disconnect(ws)
@@ -4,10 +4,10 @@ from __future__ import annotations
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
-from ..services import synthesize_async, synthesize_sync
+from ..services import synthesize_async, synthesize_stream, synthesize_sync
 
 router = APIRouter(prefix="/tts", tags=["tts"])
 
@@ -32,6 +32,31 @@ async def tts_get(text: str, voice_id: Optional[str] = None):
     return Response(content=b"", status_code=204)
 
 
+@router.get("/stream")
+async def tts_stream(text: str, voice_id: Optional[str] = None):
+    """
+    Synthesize text to speech, forwarding audio chunks as they arrive.
+    Returns a chunked audio/mpeg stream.
+    """
+    if not text:
+        raise HTTPException(status_code=400, detail="Text is required")
+
+    # Pull the first chunk before committing to a 200: no API key, a failed
+    # request or an empty response yield nothing and get a 204 like tts_get.
+    chunks = synthesize_stream(text, voice_id)
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        return Response(content=b"", status_code=204)
+
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(body(), media_type="audio/mpeg")
+
+
 @router.post("")
 async def tts_post(request: TTSRequest):
     """
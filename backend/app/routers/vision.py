@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, UploadFile, File
@@ -76,7 +75,7 @@ async def analyze_current_frame():
 @router.get("/frame")
 async def get_current_frame():
     """Get the current camera frame as base64 JPEG."""
-    b64 = frame_buffer.get_base64_jpeg()
+    b64 = await frame_buffer.get_base64_jpeg_async()
     if b64 is None:
         raise HTTPException(status_code=503, detail="No camera frame available")
     
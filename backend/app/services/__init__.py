@@ -2,7 +2,7 @@
 from .frame_buffer import frame_buffer, FrameBuffer
 from .websocket import ws_manager, ConnectionManager
 from .haptic import send_intensity, close as close_haptic, is_connected as haptic_connected
-from .tts import synthesize_async, synthesize_sync, speak
+from .tts import synthesize_async, synthesize_stream, synthesize_sync, speak, close as close_tts
 from .vision import (
     analyze_frame_sync,
     analyze_frame_async,
@@ -20,8 +20,10 @@ __all__ = [
     "close_haptic",
     "haptic_connected",
     "synthesize_async",
+    "synthesize_stream",
     "synthesize_sync",
     "speak",
+    "close_tts",
     "analyze_frame_sync",
     "analyze_frame_async",
     "inference_loop",
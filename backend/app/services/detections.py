@@ -0,0 +1,131 @@
+"""Validation of Gemini detection payloads, shared by the vision services."""
+from __future__ import annotations
+
+import re
+from itertools import chain
+from typing import Any, Optional
+
+import numpy as np
+
+DEFAULT_VOICE_PROMPT = "Path is clear"
+MAX_VOICE_WORDS = 10
+MAX_DETECTIONS = 12
+MAX_LABEL_LENGTH = 40
+
+# Markdown fence lines (```json ... ```) Gemini sometimes wraps JSON in.
+_FENCE_RE = re.compile(r"^[ \t]*```.*$\n?", re.M)
+
+
+def strip_code_fence(text: str) -> str:
+    """Return ``text`` stripped, without any markdown code fence lines."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = _FENCE_RE.sub("", text).strip()
+    return text
+
+
+def _parse_detection(item: Any) -> Optional[tuple[str, Any]]:
+    """Extract (label, raw box) from a detection dict or a bare box list.
+
+    Coordinates are left unconverted; clamp_boxes() coerces them in bulk.
+    """
+    if isinstance(item, dict):
+        label = str(item.get("label", "obstacle")).strip() or "obstacle"
+        box = item.get("box")
+    elif isinstance(item, (list, tuple)):
+        label = "obstacle"
+        box = item
+    else:
+        return None
+
+    if not isinstance(box, (list, tuple)) or len(box) != 4:
+        return None
+
+    return label[:MAX_LABEL_LENGTH], box
+
+
+def _box_array(boxes: list[Any]) -> np.ndarray:
+    """Coerce 4-element boxes to an (N, 4) float array; bad rows become NaN."""
+    try:
+        return np.fromiter(
+            chain.from_iterable(boxes), dtype=np.float64, count=4 * len(boxes)
+        ).reshape(-1, 4)
+    except (TypeError, ValueError):
+        pass
+
+    # Rare malformed coordinate: convert row by row so one bad box is dropped
+    # instead of the whole response.
+    arr = np.full((len(boxes), 4), np.nan)
+    for i, box in enumerate(boxes):
+        try:
+            arr[i] = box
+        except (TypeError, ValueError):
+            pass
+    return arr
+
+
+def clamp_boxes(boxes: list[Any]) -> tuple[np.ndarray, np.ndarray]:
+    """Clamp boxes to the 0-1000 grid; returns int boxes and a validity mask."""
+    arr = _box_array(boxes)
+    finite = np.isfinite(arr).all(axis=1)
+    arr[~finite] = 0.0
+    np.clip(arr, 0, 1000, out=arr)
+    ints = arr.astype(np.int32)
+    valid = finite & (ints[:, 2] > ints[:, 0]) & (ints[:, 3] > ints[:, 1])
+    return ints, valid
+
+
+def estimate_haptic(detections: list[dict[str, Any]]) -> int:
+    """Derive a 0-255 intensity from box size and how low it sits in frame."""
+    if not detections:
+        return 0
+
+    arr = np.array([d["box"] for d in detections], dtype=np.float32)
+    area = np.maximum(1.0, (arr[:, 2] - arr[:, 0]) * (arr[:, 3] - arr[:, 1]))
+    size_score = np.minimum(1.0, area / 250_000.0)
+    ground_score = np.minimum(1.0, arr[:, 2] / 1000.0)
+    score = np.clip(0.65 * size_score + 0.35 * ground_score, 0.0, 1.0)
+    return int(score.max() * 255)
+
+
+def sanitize(payload: Any) -> Optional[dict[str, Any]]:
+    """Validate a Gemini response into voice_prompt/detections/haptic_intensity."""
+    if not isinstance(payload, dict):
+        return None
+
+    voice_prompt = str(payload.get("voice_prompt", DEFAULT_VOICE_PROMPT)).strip()
+    if not voice_prompt:
+        voice_prompt = DEFAULT_VOICE_PROMPT
+    words = voice_prompt.split()
+    if len(words) > MAX_VOICE_WORDS:
+        voice_prompt = " ".join(words[:MAX_VOICE_WORDS])
+
+    detections: list[dict[str, Any]] = []
+    detections_raw = payload.get("detections", [])
+    if detections_raw and isinstance(detections_raw, list):
+        labels: list[str] = []
+        boxes: list[Any] = []
+        for item in detections_raw[:MAX_DETECTIONS]:
+            parsed = _parse_detection(item)
+            if parsed is not None:
+                labels.append(parsed[0])
+                boxes.append(parsed[1])
+        if boxes:
+            ints, valid = clamp_boxes(boxes)
+            kept = np.flatnonzero(valid).tolist()
+            detections = [
+                {"label": labels[i], "box": box}
+                for i, box in zip(kept, ints[valid].tolist())
+            ]
+
+    try:
+        haptic_intensity = int(payload.get("haptic_intensity"))
+    except (TypeError, ValueError):
+        haptic_intensity = estimate_haptic(detections)
+    haptic_intensity = max(0, min(255, haptic_intensity))
+
+    return {
+        "voice_prompt": voice_prompt,
+        "detections": detections,
+        "haptic_intensity": haptic_intensity,
+    }
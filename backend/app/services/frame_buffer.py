@@ -1,11 +1,13 @@
 """Thread-safe frame buffer for camera frames."""
 from __future__ import annotations
 
+import asyncio
 import base64
 import math
 import os
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 import cv2
@@ -13,25 +15,85 @@ import numpy as np
 
 from ..config import CAMERA_SOURCE
 
+# Dedicated pool so frame encodes never starve the default executor.
+_encode_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="frame-encode")
+
+_tj = None
+_tj_subsample = 0
+_tj_unavailable = False
+
+
+def _get_turbojpeg():
+    """Lazily load libjpeg-turbo via PyTurboJPEG; None if it is not installed."""
+    global _tj, _tj_subsample, _tj_unavailable
+    if _tj is not None or _tj_unavailable:
+        return _tj
+    try:
+        from turbojpeg import TJSAMP_420, TurboJPEG
+        _tj = TurboJPEG()
+        _tj_subsample = TJSAMP_420
+    except Exception as e:
+        print(f"[FrameBuffer] TurboJPEG unavailable, using OpenCV encoder: {e}")
+        _tj_unavailable = True
+    return _tj
+
+
+def encode_jpeg(frame: np.ndarray, quality: int) -> Optional[bytes]:
+    """Encode a BGR frame as JPEG, preferring libjpeg-turbo."""
+    tj = _get_turbojpeg()
+    if tj is not None:
+        return tj.encode(frame, quality=quality, jpeg_subsample=_tj_subsample)
+    ok, jpg = cv2.imencode(
+        ".jpg",
+        frame,
+        [
+            cv2.IMWRITE_JPEG_QUALITY, quality,
+            cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+            cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+        ],
+    )
+    if not ok:
+        return None
+    return jpg.tobytes()
+
 
 class FrameBuffer:
     """Thread-safe shared frame buffer for latest camera frame."""
 
     def __init__(self, source: int | str = 0) -> None:
         self._lock = threading.Lock()
+        # Shares _lock; notified on every publish so streamers can block.
+        self._new_frame = threading.Condition(self._lock)
         self._frame: Optional[np.ndarray] = None
+        self._frame_id = 0
+        # Encoded forms of the current frame only, keyed by (kind, quality).
+        self._encoded_cache: dict[tuple[str, int], bytes | str] = {}
         self._running = False
         self._cap = None
         self._source = source
         self._thread: Optional[threading.Thread] = None
         self._demo_tick = 0
         self._using_demo_frames = False
+        # Static demo-frame captions, rasterized once on first use.
+        self._demo_background: Optional[np.ndarray] = None
+        self._text_overlay: Optional[np.ndarray] = None
+        self._text_mask: Optional[np.ndarray] = None
 
     def start(self) -> None:
         """Start the capture thread."""
         if self._running:
             return
-        self._cap = cv2.VideoCapture(self._source)
+        if isinstance(self._source, str):
+            # Network streams (ESP32-CAM) go through FFmpeg with input buffering off.
+            os.environ.setdefault(
+                "OPENCV_FFMPEG_CAPTURE_OPTIONS", "fflags;nobuffer|flags;low_delay"
+            )
+            self._cap = cv2.VideoCapture(self._source, cv2.CAP_FFMPEG)
+            if not self._cap.isOpened():
+                self._cap = cv2.VideoCapture(self._source, cv2.CAP_ANY)
+        else:
+            self._cap = cv2.VideoCapture(self._source)
+        self._cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
         self._cap.set(cv2.CAP_PROP_FPS, 30)
@@ -45,25 +107,12 @@ class FrameBuffer:
         height, width = 720, 1280
         self._demo_tick += 1
 
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
-        x_gradient = np.tile(np.linspace(10, 65, width, dtype=np.uint8), (height, 1))
-        y_gradient = np.tile(np.linspace(5, 48, height, dtype=np.uint8)[:, None], (1, width))
-        
-        frame[:, :, 0] = np.clip(x_gradient // 2, 0, 255)
-        frame[:, :, 1] = np.clip(x_gradient + y_gradient, 0, 255)
-        frame[:, :, 2] = np.clip(y_gradient // 4, 0, 255)
-
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (width, height), (0, 0, 0), -1)
-        frame = cv2.addWeighted(overlay, 0.72, frame, 0.28, 0.0)
-
         warning = (210, 240, 30)
-
         margin = 58
-        cv2.rectangle(frame, (margin, margin), (width - margin, height - margin), warning, 3)
-        cv2.line(frame, (width // 2, margin), (width // 2, height - margin), (95, 145, 20), 1)
-        cv2.line(frame, (margin, height // 2), (width - margin, height // 2), (95, 145, 20), 1)
-        cv2.circle(frame, (width // 2, height // 2), 38, (205, 235, 70), 3)
+
+        if self._demo_background is None:
+            self._demo_background = self._render_demo_background(width, height, margin, warning)
+        frame = self._demo_background.copy()
 
         oscillation = math.sin(self._demo_tick / 11.0)
         obstacle_center = int(width * 0.75 + oscillation * width * 0.08)
@@ -88,26 +137,10 @@ class FrameBuffer:
             cv2.LINE_AA,
         )
 
-        cv2.putText(
-            frame,
-            "ECHO-SIGHT DEMO MODE",
-            (95, 132),
-            cv2.FONT_HERSHEY_DUPLEX,
-            1.65,
-            warning,
-            3,
-            cv2.LINE_AA,
-        )
-        cv2.putText(
-            frame,
-            "No physical camera connected. Set CAMERA_SOURCE or ESP32_CAM_URL.",
-            (95, 185),
-            cv2.FONT_HERSHEY_DUPLEX,
-            0.95,
-            (220, 240, 120),
-            2,
-            cv2.LINE_AA,
-        )
+        if self._text_overlay is None:
+            self._render_demo_text_overlay(width, height, warning)
+        cv2.copyTo(self._text_overlay, self._text_mask, frame)
+
         cv2.putText(
             frame,
             f"LOCAL TIME {time.strftime('%H:%M:%S')}",
@@ -118,23 +151,66 @@ class FrameBuffer:
             2,
             cv2.LINE_AA,
         )
-        cv2.putText(
-            frame,
-            "LIVE DEMO STREAM",
-            (width - 430, height - 108),
-            cv2.FONT_HERSHEY_DUPLEX,
-            0.95,
-            warning,
-            2,
-            cv2.LINE_AA,
-        )
+        return frame
+
+    @staticmethod
+    def _render_demo_background(
+        width: int, height: int, margin: int, warning: tuple[int, int, int]
+    ) -> np.ndarray:
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        x_gradient = np.tile(np.linspace(10, 65, width, dtype=np.uint8), (height, 1))
+        y_gradient = np.tile(np.linspace(5, 48, height, dtype=np.uint8)[:, None], (1, width))
+
+        frame[:, :, 0] = np.clip(x_gradient // 2, 0, 255)
+        frame[:, :, 1] = np.clip(x_gradient + y_gradient, 0, 255)
+        frame[:, :, 2] = np.clip(y_gradient // 4, 0, 255)
+
+        overlay = frame.copy()
+        cv2.rectangle(overlay, (0, 0), (width, height), (0, 0, 0), -1)
+        frame = cv2.addWeighted(overlay, 0.72, frame, 0.28, 0.0)
 
+        cv2.rectangle(frame, (margin, margin), (width - margin, height - margin), warning, 3)
+        cv2.line(frame, (width // 2, margin), (width // 2, height - margin), (95, 145, 20), 1)
+        cv2.line(frame, (margin, height // 2), (width - margin, height // 2), (95, 145, 20), 1)
+        cv2.circle(frame, (width // 2, height // 2), 38, (205, 235, 70), 3)
         return frame
 
+    def _render_demo_text_overlay(
+        self, width: int, height: int, warning: tuple[int, int, int]
+    ) -> None:
+        captions = (
+            ("ECHO-SIGHT DEMO MODE", (95, 132), 1.65, warning, 3),
+            (
+                "No physical camera connected. Set CAMERA_SOURCE or ESP32_CAM_URL.",
+                (95, 185),
+                0.95,
+                (220, 240, 120),
+                2,
+            ),
+            ("LIVE DEMO STREAM", (width - 430, height - 108), 0.95, warning, 2),
+        )
+        overlay = np.zeros((height, width, 3), dtype=np.uint8)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        for text, origin, scale, color, thickness in captions:
+            for target, fill in ((overlay, color), (mask, 255)):
+                cv2.putText(
+                    target,
+                    text,
+                    origin,
+                    cv2.FONT_HERSHEY_DUPLEX,
+                    scale,
+                    fill,
+                    thickness,
+                    cv2.LINE_AA,
+                )
+        self._text_overlay = overlay
+        self._text_mask = mask
+
     def _capture_loop(self) -> None:
         while self._running:
             if self._cap is None:
                 break
+            # A fresh array per frame: readers may still hold older frames.
             ret, frame = self._cap.read()
             if not ret or frame is None:
                 frame = self._build_demo_frame()
@@ -145,38 +221,92 @@ class FrameBuffer:
                 print("[FrameBuffer] Camera feed recovered. Returning to live frames.")
                 self._using_demo_frames = False
 
-            with self._lock:
-                self._frame = frame
+            self._publish(frame)
             time.sleep(1 / 30)
 
+    def _publish(self, frame: np.ndarray) -> None:
+        # Published frames are never written again, so readers can use them
+        # without copying; read-only makes any accidental write fail loudly.
+        frame.flags.writeable = False
+        with self._new_frame:
+            self._frame = frame
+            self._frame_id += 1
+            self._encoded_cache = {}
+            self._new_frame.notify_all()
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the latest published frame (0 before the first)."""
+        return self._frame_id
+
+    def wait_for_frame(self, last_seq: int, timeout: float) -> int:
+        """Block until a frame newer than ``last_seq`` is published or ``timeout`` passes.
+
+        Returns the current sequence number, which equals ``last_seq`` on timeout.
+        """
+        with self._new_frame:
+            self._new_frame.wait_for(lambda: self._frame_id != last_seq, timeout=timeout)
+            return self._frame_id
+
     def update(self, frame: np.ndarray) -> None:
         """Manually update the frame (for external sources like ESP32-CAM)."""
         if frame is None:
             return
-        with self._lock:
-            self._frame = frame.copy()
+        # The caller keeps ownership of its array; publish a private copy.
+        self._publish(frame.copy())
 
     def get(self) -> Optional[np.ndarray]:
-        """Get a copy of the latest frame."""
+        """Get the latest frame as a read-only array; copy it to modify.
+
+        Every capture is decoded into a fresh array that is never written
+        again once published, so it is safe to hold without copying.
+        """
         with self._lock:
-            return self._frame.copy() if self._frame is not None else None
+            return self._frame
 
     def get_jpeg(self, quality: int = 80) -> Optional[bytes]:
         """Get the latest frame as JPEG bytes."""
-        frame = self.get()
+        # Published frames are immutable, so the encoder reads the current
+        # reference directly instead of a copy.
+        key = ("jpeg", quality)
+        with self._lock:
+            frame = self._frame
+            frame_id = self._frame_id
+            cached = self._encoded_cache.get(key)
+        if cached is not None:
+            return cached
         if frame is None:
             return None
-        ok, jpg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
-        if not ok:
-            return None
-        return jpg.tobytes()
+        jpg = encode_jpeg(frame, quality)
+        if jpg is not None:
+            self._store_encoded(frame_id, key, jpg)
+        return jpg
 
     def get_base64_jpeg(self, quality: int = 75) -> Optional[str]:
         """Get the latest frame as base64-encoded JPEG."""
+        key = ("base64", quality)
+        with self._lock:
+            frame_id = self._frame_id
+            cached = self._encoded_cache.get(key)
+        if cached is not None:
+            return cached
         jpg = self.get_jpeg(quality=quality)
         if jpg is None:
             return None
-        return base64.b64encode(jpg).decode("ascii")
+        b64 = base64.b64encode(jpg).decode("ascii")
+        self._store_encoded(frame_id, key, b64)
+        return b64
+
+    def _store_encoded(self, frame_id: int, key: tuple[str, int], value: bytes | str) -> None:
+        with self._lock:
+            # Drop results for frames that were superseded while encoding.
+            if frame_id == self._frame_id:
+                self._encoded_cache[key] = value
+
+    async def get_base64_jpeg_async(self, quality: int = 75) -> Optional[str]:
+        """Encode the latest frame off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_encode_executor, self.get_base64_jpeg, quality)
 
     def stop(self) -> None:
         """Stop the capture thread."""
@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 import threading
+import time
+from array import array
 from typing import Optional
 
 from ..config import SERIAL_PORT, SERIAL_BAUD
@@ -10,13 +12,31 @@ _ser = None
 _lock = threading.Lock()
 _connection_warned = False
 
+# One preallocated single-byte payload per intensity level.
+_BYTE_TABLE = tuple(bytes((i,)) for i in range(256))
+
+# Latest-value slot drained by a single writer thread. Callers only overwrite
+# the slot and signal; intermediate values are conflated away.
+_latest = array("B", [0])
+_pending = threading.Event()
+_writer_thread: Optional[threading.Thread] = None
+_writer_start_lock = threading.Lock()
+_last_sent: Optional[int] = None
+# serial.SerialTimeoutException once pyserial has been imported.
+_write_timeout_error: type[Exception] = BlockingIOError
+# Pause before retrying a byte the non-blocking UART did not accept.
+_RETRY_BACKOFF_SECONDS = 0.005
+
 
 def _get_serial():
-    global _ser, _connection_warned
+    global _ser, _connection_warned, _write_timeout_error
     if _ser is None:
         try:
             import serial
-            _ser = serial.Serial(SERIAL_PORT, SERIAL_BAUD, timeout=1)
+            _write_timeout_error = serial.SerialTimeoutException
+            # Non-blocking: a byte the UART cannot take right now is dropped,
+            # the next intensity supersedes it anyway.
+            _ser = serial.Serial(SERIAL_PORT, SERIAL_BAUD, timeout=0, write_timeout=0)
             print(f"[Haptic] Connected to {SERIAL_PORT} @ {SERIAL_BAUD}")
             _connection_warned = False
         except Exception as e:
@@ -27,29 +47,70 @@ def _get_serial():
     return _ser
 
 
-def send_intensity(value: int) -> bool:
-    """Send haptic intensity (0-255) to ESP32 as a single byte."""
-    value = max(0, min(255, int(value)))
-    with _lock:
-        s = _get_serial()
-        if s and s.is_open:
+def _writer_loop() -> None:
+    global _last_sent
+    while True:
+        _pending.wait()
+        _pending.clear()
+        value = _latest[0]
+        if value == _last_sent:
+            continue
+        written = 0
+        with _lock:
+            s = _get_serial()
+            if not (s and s.is_open):
+                continue
             try:
-                s.write(bytes([value]))
-                return True
+                written = s.write(_BYTE_TABLE[value])
+            except (BlockingIOError, _write_timeout_error):
+                pass
             except Exception as e:
                 print(f"[Haptic] Write error: {e}")
-                return False
-    return False
+                continue
+        if written == 1:
+            _last_sent = value
+        else:
+            # The UART was full; a dropped final 0 would leave the motor
+            # running, so retry whatever the latest value is by then.
+            time.sleep(_RETRY_BACKOFF_SECONDS)
+            _pending.set()
+
+
+def _ensure_writer() -> None:
+    global _writer_thread
+    if _writer_thread is not None:
+        return
+    with _writer_start_lock:
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(
+                target=_writer_loop, name="haptic-writer", daemon=True
+            )
+            _writer_thread.start()
+
+
+def send_intensity(value: int) -> bool:
+    """Queue haptic intensity (0-255) for the ESP32; only the latest value is written."""
+    _latest[0] = max(0, min(255, int(value)))
+    _ensure_writer()
+    _pending.set()
+
+    s = _ser
+    if s is None:
+        # Cold path: open the port so callers get an accurate status.
+        with _lock:
+            s = _get_serial()
+    return bool(s and s.is_open)
 
 
 def close() -> None:
     """Close the serial connection."""
-    global _ser
+    global _ser, _last_sent
     with _lock:
         if _ser and _ser.is_open:
             _ser.close()
             _ser = None
             print("[Haptic] Serial connection closed")
+        _last_sent = None
 
 
 def is_connected() -> bool:
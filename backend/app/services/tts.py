@@ -1,7 +1,13 @@
 """Text-to-speech service using ElevenLabs."""
 from __future__ import annotations
 
-from typing import Any, Optional
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, AsyncIterator, Optional
 
 import httpx
 
@@ -9,29 +15,95 @@ from ..config import ELEVENLABS_API_KEY, ELEVENLABS_VOICE_ID
 from ..database import SessionLocal
 from ..models import VoiceProfile
 
+logger = logging.getLogger("echo-sight.tts")
+
 _http: Optional[httpx.AsyncClient] = None
+_sync_http: Optional[httpx.Client] = None
+_sync_http_lock = threading.Lock()
 _no_key_warned = False
 
+_ELEVENLABS_BASE_URL = "https://api.elevenlabs.io"
+_TTS_URL = f"{_ELEVENLABS_BASE_URL}/v1/text-to-speech"
+_HEADERS = {
+    "xi-api-key": ELEVENLABS_API_KEY,
+    "Content-Type": "application/json",
+}
+# Synthesized audio keyed by (voice, text, settings); repeated prompts such as
+# "Path is clear" are served from memory, concurrent duplicates share one call.
+_CACHE_MAX_ENTRIES = 256
+_CACHE_TTL_SECONDS = 600.0
+_audio_cache: "OrderedDict[tuple, tuple[float, bytes]]" = OrderedDict()
+_inflight: dict[tuple, asyncio.Future] = {}
+
+_DEFAULT_PROFILE: dict[str, Any] = {
+    "voice_id": ELEVENLABS_VOICE_ID,
+    "stability": 0.5,
+    "clarity": 0.75,
+    "style_exaggeration": 0.0,
+    "playback_speed": 1.0,
+}
+
 
 def _get_http() -> httpx.AsyncClient:
+    """Process-wide HTTP/2 client so TTS calls reuse warm TLS connections."""
     global _http
     if _http is None:
-        _http = httpx.AsyncClient(timeout=10.0)
+        _http = httpx.AsyncClient(
+            http2=True,
+            base_url=_ELEVENLABS_BASE_URL,
+            headers=_HEADERS,
+            timeout=httpx.Timeout(10.0, connect=3.0),
+            limits=httpx.Limits(
+                max_connections=32,
+                max_keepalive_connections=20,
+                keepalive_expiry=60,
+            ),
+        )
     return _http
 
 
-def _clamp(value: float, minimum: float, maximum: float) -> float:
-    return max(minimum, min(maximum, value))
+def _get_sync_http() -> httpx.Client:
+    global _sync_http
+    if _sync_http is None:
+        with _sync_http_lock:
+            if _sync_http is None:
+                _sync_http = httpx.Client(
+                    http2=True,
+                    base_url=_ELEVENLABS_BASE_URL,
+                    headers=_HEADERS,
+                    timeout=15.0,
+                    limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=60),
+                )
+    return _sync_http
+
+
+async def close() -> None:
+    """Close the shared HTTP clients."""
+    global _http, _sync_http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+    with _sync_http_lock:
+        if _sync_http is not None:
+            _sync_http.close()
+            _sync_http = None
+
+
+def _clamp01(value: float) -> float:
+    return 0.0 if value < 0.0 else (1.0 if value > 1.0 else value)
+
+
+def _clamp_speed(value: float) -> float:
+    return 0.5 if value < 0.5 else (2.0 if value > 2.0 else value)
+
+
+@lru_cache(maxsize=64)
+def _voice_url(voice_id: str) -> str:
+    return f"{_TTS_URL}/{voice_id}"
 
 
 def _resolve_active_profile() -> dict[str, Any]:
-    defaults = {
-        "voice_id": ELEVENLABS_VOICE_ID,
-        "stability": 0.5,
-        "clarity": 0.75,
-        "style_exaggeration": 0.0,
-        "playback_speed": 1.0,
-    }
+    defaults = _DEFAULT_PROFILE
     db = SessionLocal()
     try:
         profile = (
@@ -60,6 +132,9 @@ def _build_voice_settings(
     override_settings: Optional[dict[str, float]] = None,
     override_speed: Optional[float] = None,
 ) -> dict[str, float]:
+    if profile is _DEFAULT_PROFILE and not override_settings and override_speed is None:
+        return dict(_DEFAULT_VOICE_SETTINGS)
+
     settings = override_settings or {}
     stability = float(settings.get("stability", profile["stability"]))
     clarity = float(settings.get("clarity", settings.get("similarity_boost", profile["clarity"])))
@@ -67,10 +142,42 @@ def _build_voice_settings(
     speed = float(profile["playback_speed"] if override_speed is None else override_speed)
 
     return {
-        "stability": _clamp(stability, 0.0, 1.0),
-        "similarity_boost": _clamp(clarity, 0.0, 1.0),
-        "style": _clamp(style, 0.0, 1.0),
-        "speed": _clamp(speed, 0.5, 2.0),
+        "stability": _clamp01(stability),
+        "similarity_boost": _clamp01(clarity),
+        "style": _clamp01(style),
+        "speed": _clamp_speed(speed),
+    }
+
+
+_DEFAULT_VOICE_SETTINGS = _build_voice_settings(dict(_DEFAULT_PROFILE))
+
+
+def _cache_get(key: tuple) -> Optional[bytes]:
+    entry = _audio_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, audio = entry
+    if time.monotonic() - stored_at > _CACHE_TTL_SECONDS:
+        del _audio_cache[key]
+        return None
+    _audio_cache.move_to_end(key)
+    return audio
+
+
+def _cache_put(key: tuple, audio: bytes) -> None:
+    _audio_cache[key] = (time.monotonic(), audio)
+    _audio_cache.move_to_end(key)
+    while len(_audio_cache) > _CACHE_MAX_ENTRIES:
+        _audio_cache.popitem(last=False)
+
+
+def _fallback_settings(full_settings: dict[str, float]) -> Optional[dict[str, float]]:
+    """Settings to retry with when the voice rejects style/speed, else None."""
+    if "style" not in full_settings and "speed" not in full_settings:
+        return None
+    return {
+        "stability": full_settings["stability"],
+        "similarity_boost": full_settings["similarity_boost"],
     }
 
 
@@ -100,42 +207,106 @@ async def synthesize_async(
         return None
     if not ELEVENLABS_API_KEY:
         if not _no_key_warned:
-            print("[TTS] No API key configured, TTS disabled")
+            logger.warning("No API key configured, TTS disabled")
             _no_key_warned = True
         return None
 
     profile = _resolve_active_profile()
     voice = voice_id or profile["voice_id"] or ELEVENLABS_VOICE_ID
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice}"
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY,
-        "Content-Type": "application/json",
-    }
+    url = _voice_url(voice)
     full_settings = _build_voice_settings(profile, voice_settings, playback_speed)
-    payload = _build_payload(text, full_settings)
 
+    key = (voice, text, tuple(full_settings.items()))
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    pending = _inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    audio: Optional[bytes] = None
+    try:
+        audio = await _post_tts(url, text, full_settings)
+        if audio:
+            _cache_put(key, audio)
+        return audio
+    finally:
+        _inflight.pop(key, None)
+        if not future.done():
+            future.set_result(audio)
+
+
+async def _post_tts(url: str, text: str, full_settings: dict[str, float]) -> Optional[bytes]:
     try:
         client = _get_http()
-        resp = await client.post(url, json=payload, headers=headers)
-        if resp.status_code >= 400 and ("style" in full_settings or "speed" in full_settings):
-            fallback_settings = {
-                "stability": full_settings["stability"],
-                "similarity_boost": full_settings["similarity_boost"],
-            }
-            resp = await client.post(
-                url,
-                json=_build_payload(text, fallback_settings),
-                headers=headers,
-            )
+        resp = await client.post(url, json=_build_payload(text, full_settings))
+        fallback_settings = _fallback_settings(full_settings)
+        if resp.status_code >= 400 and fallback_settings is not None:
+            resp = await client.post(url, json=_build_payload(text, fallback_settings))
         if resp.status_code == 200:
             return resp.content
-        print(f"[TTS] ElevenLabs error {resp.status_code}: {resp.text[:200]}")
+        logger.warning("ElevenLabs error %d: %.200s", resp.status_code, resp.text)
         return None
     except Exception as exc:
-        print(f"[TTS] Error: {exc}")
+        logger.warning("ElevenLabs request failed: %s", exc)
         return None
 
 
+async def synthesize_stream(
+    text: str,
+    voice_id: Optional[str] = None,
+    voice_settings: Optional[dict[str, float]] = None,
+    playback_speed: Optional[float] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yield mp3 chunks as ElevenLabs streams them so playback can start early.
+    Completed streams are cached and replayed in one chunk by later calls.
+    """
+    global _no_key_warned
+    if not text:
+        return
+    if not ELEVENLABS_API_KEY:
+        if not _no_key_warned:
+            logger.warning("No API key configured, TTS disabled")
+            _no_key_warned = True
+        return
+
+    profile = _resolve_active_profile()
+    voice = voice_id or profile["voice_id"] or ELEVENLABS_VOICE_ID
+    full_settings = _build_voice_settings(profile, voice_settings, playback_speed)
+
+    key = (voice, text, tuple(full_settings.items()))
+    cached = _cache_get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    url = f"{_voice_url(voice)}/stream"
+    attempts = [full_settings]
+    fallback_settings = _fallback_settings(full_settings)
+    if fallback_settings is not None:
+        attempts.append(fallback_settings)
+
+    try:
+        client = _get_http()
+        for settings in attempts:
+            async with client.stream("POST", url, json=_build_payload(text, settings)) as resp:
+                if resp.status_code != 200:
+                    body = await resp.aread()
+                    logger.warning("ElevenLabs error %d: %.200s", resp.status_code, body)
+                    continue
+                audio = bytearray()
+                async for chunk in resp.aiter_bytes():
+                    audio += chunk
+                    yield chunk
+            _cache_put(key, bytes(audio))
+            return
+    except Exception as exc:
+        logger.warning("ElevenLabs stream failed: %s", exc)
+
+
 def synthesize_sync(
     text: str,
     voice_id: Optional[str] = None,
@@ -151,35 +322,28 @@ def synthesize_sync(
         return None
     if not ELEVENLABS_API_KEY:
         if not _no_key_warned:
-            print("[TTS] No API key configured, TTS disabled")
+            logger.warning("No API key configured, TTS disabled")
             _no_key_warned = True
         return None
 
     profile = _resolve_active_profile()
     voice = voice_id or profile["voice_id"] or ELEVENLABS_VOICE_ID
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice}"
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY,
-        "Content-Type": "application/json",
-    }
+    url = _voice_url(voice)
     full_settings = _build_voice_settings(profile, voice_settings, playback_speed)
     payload = _build_payload(text, full_settings)
 
     try:
-        with httpx.Client(timeout=15.0) as client:
-            resp = client.post(url, json=payload, headers=headers)
-            if resp.status_code >= 400 and ("style" in full_settings or "speed" in full_settings):
-                fallback_settings = {
-                    "stability": full_settings["stability"],
-                    "similarity_boost": full_settings["similarity_boost"],
-                }
-                resp = client.post(url, json=_build_payload(text, fallback_settings), headers=headers)
+        client = _get_sync_http()
+        resp = client.post(url, json=payload)
+        fallback_settings = _fallback_settings(full_settings)
+        if resp.status_code >= 400 and fallback_settings is not None:
+            resp = client.post(url, json=_build_payload(text, fallback_settings))
         if resp.status_code == 200:
             return resp.content
-        print(f"[TTS] ElevenLabs error {resp.status_code}: {resp.text[:200]}")
+        logger.warning("ElevenLabs error %d: %.200s", resp.status_code, resp.text)
         return None
     except Exception as exc:
-        print(f"[TTS] synthesis error: {exc}")
+        logger.warning("Synthesis error: %s", exc)
         return None
 
 
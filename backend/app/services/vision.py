@@ -2,20 +2,27 @@
 from __future__ import annotations
 
 import asyncio
-import base64
-import json
+import copy
+import datetime
+import logging
+import threading
 import time
+from collections import OrderedDict
 from typing import Any, Optional
 
 import cv2
 import numpy as np
+import orjson
 
 from ..config import GEMINI_API_KEY
-from .frame_buffer import frame_buffer
+from .detections import sanitize, strip_code_fence
+from .frame_buffer import encode_jpeg, frame_buffer
 from .websocket import ws_manager
 from .haptic import send_intensity
 from .tts import speak
 
+logger = logging.getLogger("echo-sight.vision")
+
 SYSTEM_INSTRUCTION = """You are an accessibility spatial-grounding engine.
 
 Return ONLY JSON:
@@ -30,75 +37,98 @@ Rules:
 - haptic_intensity must be 0-255 integer
 - no markdown or additional keys"""
 
+_GEMINI_MODEL = "gemini-2.0-flash"
+_GENERATION_CONFIG = {"temperature": 0.1, "max_output_tokens": 350}
+# Explicit context cache for SYSTEM_INSTRUCTION; rebuilt shortly before expiry.
+_CONTEXT_CACHE_TTL_SECONDS = 3600
+_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = 120
+_INFERENCE_INTERVAL_SECONDS = 1.0
+# Frames sent to Gemini are downscaled and encoded at a lower quality;
+# detections are on a normalized 0-1000 grid so resolution does not matter.
+_UPLOAD_MAX_DIM = 512
+_MOTION_WORKING_DIM = 320
+_MOTION_THRESHOLD = 22
+_MOTION_MIN_AREA_PX = 1200.0
+_MOTION_MIN_AREA_RATIO = 0.003
+# Two passes of the default 3x3 rect dilation equal one 5x5 pass.
+_DILATE_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+# Gemini results for visually identical frames, keyed by 64-bit dHash.
+_RESPONSE_CACHE_MAX_ENTRIES = 64
+_RESPONSE_CACHE_TTL_SECONDS = 3.0
+_UPLOAD_JPEG_QUALITY = 55
+_MAX_INFLIGHT_INFERENCES = 4
+
 _model = None
+_model_expires_at = 0.0
+# Overlapping analyses all see an expired model at once; only one rebuilds.
+_model_lock = threading.Lock()
 _tick = 0
 _no_key_warned = False
-_prev_gray: Optional[np.ndarray] = None
+_prev_gray: Any = None  # np.ndarray, or cv2.UMat when OpenCL is in use
+_prev_gray_size: Optional[tuple[int, int]] = None
+# Overlapped analyses run the fallback on several worker threads; it diffs
+# against shared previous-frame state, so calls are serialized.
+_motion_lock = threading.Lock()
+_use_opencl: Optional[bool] = None
+_response_cache: "OrderedDict[int, tuple[float, dict[str, Any]]]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+
+def _build_model(genai):
+    """Build the Gemini model, serving the system prompt from a context cache when possible.
+
+    Returns ``(model, expires_at)``. A superseded cache is not deleted:
+    requests already in flight may still reference it, and it lapses on its
+    own within the refresh margin.
+    """
+    try:
+        cache = genai.caching.CachedContent.create(
+            model=f"models/{_GEMINI_MODEL}",
+            system_instruction=SYSTEM_INSTRUCTION,
+            ttl=datetime.timedelta(seconds=_CONTEXT_CACHE_TTL_SECONDS),
+        )
+        model = genai.GenerativeModel.from_cached_content(
+            cache, generation_config=_GENERATION_CONFIG
+        )
+        expires_at = (
+            time.monotonic()
+            + _CONTEXT_CACHE_TTL_SECONDS
+            - _CONTEXT_CACHE_REFRESH_MARGIN_SECONDS
+        )
+        return model, expires_at
+    except Exception as e:
+        logger.warning("Context cache unavailable, sending system instruction inline: %s", e)
+    model = genai.GenerativeModel(
+        model_name=_GEMINI_MODEL,
+        system_instruction=SYSTEM_INSTRUCTION,
+        generation_config=_GENERATION_CONFIG,
+    )
+    return model, float("inf")
 
 
 def _get_model():
-    global _model, _no_key_warned
-    if _model is not None:
+    global _model, _model_expires_at, _no_key_warned
+    if _model is not None and time.monotonic() < _model_expires_at:
         return _model
     if not GEMINI_API_KEY:
         if not _no_key_warned:
-            print("[Vision] No Gemini API key, using simulation mode")
+            logger.warning("No Gemini API key, using simulation mode")
             _no_key_warned = True
         return None
 
-    try:
-        import google.generativeai as genai
-        genai.configure(api_key=GEMINI_API_KEY)
-        _model = genai.GenerativeModel(
-            model_name="gemini-2.0-flash",
-            system_instruction=SYSTEM_INSTRUCTION,
-            generation_config={"temperature": 0.1, "max_output_tokens": 350},
-        )
-        return _model
-    except Exception as e:
-        print(f"[Vision] Failed to initialize Gemini: {e}")
-        return None
-
-
-def _sanitize(data: Any) -> Optional[dict[str, Any]]:
-    """Sanitize and validate the response from Gemini."""
-    if not isinstance(data, dict):
-        return None
-
-    voice = str(data.get("voice_prompt", "Path is clear")).strip() or "Path is clear"
-    words = voice.split()
-    if len(words) > 10:
-        voice = " ".join(words[:10])
-
-    detections: list[dict[str, Any]] = []
-    raw_detections = data.get("detections", [])
-    if isinstance(raw_detections, list):
-        for det in raw_detections[:12]:
-            if not isinstance(det, dict):
-                continue
-            label = str(det.get("label", "obstacle"))[:40]
-            box = det.get("box")
-            if not isinstance(box, (list, tuple)) or len(box) != 4:
-                continue
-            try:
-                ymin, xmin, ymax, xmax = [int(float(v)) for v in box]
-            except (TypeError, ValueError):
-                continue
-            ymin = max(0, min(1000, ymin))
-            xmin = max(0, min(1000, xmin))
-            ymax = max(0, min(1000, ymax))
-            xmax = max(0, min(1000, xmax))
-            if ymax <= ymin or xmax <= xmin:
-                continue
-            detections.append({"label": label, "box": [ymin, xmin, ymax, xmax]})
-
-    try:
-        haptic = int(data.get("haptic_intensity", 0))
-    except (TypeError, ValueError):
-        haptic = 0
-    haptic = max(0, min(255, haptic))
-
-    return {"voice_prompt": voice, "detections": detections, "haptic_intensity": haptic}
+    with _model_lock:
+        # Another thread may have rebuilt it while this one waited.
+        if _model is not None and time.monotonic() < _model_expires_at:
+            return _model
+        try:
+            import google.generativeai as genai
+            genai.configure(api_key=GEMINI_API_KEY)
+            model, expires_at = _build_model(genai)
+        except Exception as e:
+            logger.warning("Failed to initialize Gemini: %s", e)
+            return None
+        _model, _model_expires_at = model, expires_at
+    return model
 
 
 def _clock_from_x(normalized_center_x: float) -> str:
@@ -113,31 +143,70 @@ def _clock_from_x(normalized_center_x: float) -> str:
     return "2 o'clock"
 
 
+def _opencl_enabled() -> bool:
+    """Turn on OpenCV's OpenCL T-API once; False when no device is available."""
+    global _use_opencl
+    if _use_opencl is None:
+        try:
+            if cv2.ocl.haveOpenCL():
+                cv2.ocl.setUseOpenCL(True)
+            _use_opencl = bool(cv2.ocl.useOpenCL())
+        except cv2.error:
+            _use_opencl = False
+        if _use_opencl:
+            logger.info("Motion fallback running on OpenCL device")
+    return _use_opencl
+
+
 def _fallback_motion_inference(frame: np.ndarray) -> dict[str, Any]:
     """Infer obstacle location/intensity from frame motion when Gemini is unavailable."""
-    global _prev_gray, _tick
+    with _motion_lock:
+        return _motion_inference(frame)
+
+
+def _motion_inference(frame: np.ndarray) -> dict[str, Any]:
+    """Motion diff against the previous frame; caller holds _motion_lock."""
+    global _prev_gray, _prev_gray_size, _tick
 
     _tick += 1
     height, width = frame.shape[:2]
     if height == 0 or width == 0:
         return {"voice_prompt": "Path is clear", "detections": [], "haptic_intensity": 0}
 
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    gray = cv2.GaussianBlur(gray, (9, 9), 0)
-
-    if _prev_gray is None or _prev_gray.shape != gray.shape:
+    # Run the whole motion pipeline on a small working frame; boxes are
+    # normalized to 0-1000, so they come out the same at any resolution.
+    # With OpenCL the image stays on the device from resize through dilate;
+    # only the final mask is downloaded for findContours.
+    src = cv2.UMat(frame) if _opencl_enabled() else frame
+    scale = _MOTION_WORKING_DIM / max(height, width)
+    if scale < 1.0:
+        width = max(1, round(width * scale))
+        height = max(1, round(height * scale))
+        src = cv2.resize(src, (width, height), interpolation=cv2.INTER_AREA)
+    else:
+        scale = 1.0
+
+    gray = cv2.cvtColor(src, cv2.COLOR_BGR2GRAY)
+    # A 5x5 box filter has roughly the spread of the old 9x9 Gaussian
+    # (sigma ~1.7) and is far cheaper.
+    gray = cv2.boxFilter(gray, -1, (5, 5), normalize=True, borderType=cv2.BORDER_REPLICATE)
+
+    if _prev_gray is None or _prev_gray_size != (width, height) or type(_prev_gray) is not type(gray):
         _prev_gray = gray
+        _prev_gray_size = (width, height)
         return {"voice_prompt": "Scanning surroundings", "detections": [], "haptic_intensity": 0}
 
     delta = cv2.absdiff(gray, _prev_gray)
     _prev_gray = gray
 
-    _, thresh = cv2.threshold(delta, 22, 255, cv2.THRESH_BINARY)
-    thresh = cv2.dilate(thresh, None, iterations=2)
+    _, thresh = cv2.threshold(delta, _MOTION_THRESHOLD, 255, cv2.THRESH_BINARY)
+    thresh = cv2.dilate(thresh, _DILATE_KERNEL, iterations=1)
+    if isinstance(thresh, cv2.UMat):
+        thresh = thresh.get()
     contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
     frame_area = float(width * height)
-    min_area = max(1200.0, frame_area * 0.003)
+    min_area = max(_MOTION_MIN_AREA_PX * scale * scale, frame_area * _MOTION_MIN_AREA_RATIO)
     largest = None
     largest_area = 0.0
     for contour in contours:
@@ -174,91 +243,218 @@ def _fallback_motion_inference(frame: np.ndarray) -> dict[str, Any]:
     }
 
 
-def analyze_frame_sync(frame: np.ndarray) -> Optional[dict[str, Any]]:
-    """Synchronously analyze a single frame."""
-    if frame is None:
-        return None
+def _dhash(frame: np.ndarray) -> int:
+    """64-bit difference hash of a frame (9x8 grayscale, horizontal gradients)."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _cached_response(key: int) -> Optional[dict[str, Any]]:
+    now = time.monotonic()
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, data = entry
+        if now - stored_at > _RESPONSE_CACHE_TTL_SECONDS:
+            del _response_cache[key]
+            return None
+        # LRU bump only: the TTL runs from the Gemini response, so a static
+        # scene is still re-analyzed at least every TTL.
+        _response_cache.move_to_end(key)
+    result = copy.deepcopy(data)
+    result["ts"] = time.time()
+    return result
+
+
+def _store_response(key: int, data: dict[str, Any]) -> None:
+    with _response_cache_lock:
+        _response_cache[key] = (time.monotonic(), copy.deepcopy(data))
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > _RESPONSE_CACHE_MAX_ENTRIES:
+            _response_cache.popitem(last=False)
+
+
+def _encode_for_upload(frame: np.ndarray) -> Optional[bytes]:
+    height, width = frame.shape[:2]
+    longest = max(height, width)
+    if longest > _UPLOAD_MAX_DIM:
+        scale = _UPLOAD_MAX_DIM / longest
+        frame = cv2.resize(
+            frame,
+            (max(1, int(width * scale)), max(1, int(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+    return encode_jpeg(frame, _UPLOAD_JPEG_QUALITY)
+
+
+def _fallback_result(frame: np.ndarray) -> dict[str, Any]:
+    fallback = _fallback_motion_inference(frame)
+    fallback["ts"] = time.time()
+    return fallback
+
 
+def _prepare_request(
+    frame: np.ndarray,
+) -> tuple[Optional[dict[str, Any]], Optional[tuple[Any, int, bytes]]]:
+    """Stage 1: resolve a frame locally or build its Gemini upload.
+
+    Returns ``(result, None)`` when no request is needed (no model, cache hit,
+    encode failure), otherwise ``(None, (model, frame_key, jpeg_bytes))``.
+    """
     model = _get_model()
     if model is None:
-        fallback = _fallback_motion_inference(frame)
-        fallback["ts"] = time.time()
-        return fallback
+        return _fallback_result(frame), None
+
+    frame_key = _dhash(frame)
+    cached = _cached_response(frame_key)
+    if cached is not None:
+        return cached, None
+
+    image_bytes = _encode_for_upload(frame)
+    if image_bytes is None:
+        return None, None
+    return None, (model, frame_key, image_bytes)
+
+
+def _analysis_request(image_bytes: bytes) -> list[Any]:
+    return [
+        {"mime_type": "image/jpeg", "data": image_bytes},
+        "Analyze nearby obstacles and return JSON only.",
+    ]
+
+
+def _request_analysis(model: Any, image_bytes: bytes) -> str:
+    """Stage 2: blocking Gemini round-trip; returns the raw response text."""
+    response = model.generate_content(_analysis_request(image_bytes))
+    return getattr(response, "text", "") or ""
+
+
+async def _request_analysis_async(model: Any, image_bytes: bytes) -> str:
+    """Stage 2 on the SDK's async transport; holds no thread while waiting."""
+    response = await model.generate_content_async(_analysis_request(image_bytes))
+    return getattr(response, "text", "") or ""
+
+
+def _finish_analysis(frame: np.ndarray, frame_key: int, text: str) -> dict[str, Any]:
+    """Stage 3: parse and sanitize the response, falling back to motion."""
+    try:
+        data = sanitize(orjson.loads(strip_code_fence(text)))
+    except Exception as e:
+        logger.warning("Analysis error: %s", e)
+        return _fallback_result(frame)
+    if not data:
+        return _fallback_result(frame)
+    _store_response(frame_key, data)
+    data["ts"] = time.time()
+    return data
 
-    ok, jpg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 72])
-    if not ok:
+
+def analyze_frame_sync(frame: np.ndarray) -> Optional[dict[str, Any]]:
+    """Synchronously analyze a single frame."""
+    if frame is None:
         return None
-    
-    b64 = base64.b64encode(jpg.tobytes()).decode("ascii")
-    image_bytes = base64.b64decode(b64)
+
+    result, request = _prepare_request(frame)
+    if request is None:
+        return result
+    model, frame_key, image_bytes = request
 
     try:
-        response = model.generate_content(
-            [
-                {"mime_type": "image/jpeg", "data": image_bytes},
-                "Analyze nearby obstacles and return JSON only.",
-            ]
-        )
-        text = (getattr(response, "text", "") or "").strip()
-        if text.startswith("```"):
-            lines = [line for line in text.splitlines() if not line.strip().startswith("```")]
-            text = "\n".join(lines).strip()
-        
-        data = _sanitize(json.loads(text))
-        if data:
-            data["ts"] = time.time()
-            return data
-        fallback = _fallback_motion_inference(frame)
-        fallback["ts"] = time.time()
-        return fallback
+        text = _request_analysis(model, image_bytes)
     except Exception as e:
-        print(f"[Vision] Analysis error: {e}")
-        fallback = _fallback_motion_inference(frame)
-        fallback["ts"] = time.time()
-        return fallback
+        logger.warning("Analysis error: %s", e)
+        return _fallback_result(frame)
+    return _finish_analysis(frame, frame_key, text)
 
 
 async def analyze_frame_async(frame: Optional[np.ndarray] = None) -> Optional[dict[str, Any]]:
-    """Asynchronously analyze a frame (uses frame_buffer if no frame provided)."""
+    """Asynchronously analyze a frame (uses frame_buffer if no frame provided).
+
+    Encoding and parsing run on the default executor; the Gemini call is
+    awaited on the event loop, so in-flight requests pin no threads.
+    """
     if frame is None:
         frame = frame_buffer.get()
     if frame is None:
         return None
 
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, analyze_frame_sync, frame)
+    result, request = await asyncio.to_thread(_prepare_request, frame)
+    if request is None:
+        return result
+    model, frame_key, image_bytes = request
+
+    try:
+        text = await _request_analysis_async(model, image_bytes)
+    except Exception as e:
+        logger.warning("Analysis error: %s", e)
+        return await asyncio.to_thread(_fallback_result, frame)
+    return await asyncio.to_thread(_finish_analysis, frame, frame_key, text)
+
+
+async def _dispatch_result(result: dict[str, Any]) -> None:
+    voice_prompt = result.get("voice_prompt", "")
+    haptic = int(result.get("haptic_intensity", 0))
+    await set_latest_analysis(result)
+
+    # Send haptic feedback; this only hands the value to the writer thread.
+    send_intensity(haptic)
+
+    # Broadcast to WebSocket clients
+    await ws_manager.broadcast({
+        "voice_prompt": voice_prompt,
+        "detections": result.get("detections", []),
+        "haptic_intensity": haptic,
+        "ts": result.get("ts", time.time()),
+    })
+
+    # Trigger TTS if needed
+    if voice_prompt:
+        asyncio.create_task(speak(voice_prompt))
 
 
 async def inference_loop() -> None:
-    """Continuously analyze frames and dispatch results."""
-    print("[Vision] Inference loop started")
-    while True:
+    """Continuously analyze frames and dispatch results.
+
+    A new analysis is started every interval without waiting for earlier
+    ones, with at most _MAX_INFLIGHT_INFERENCES overlapping Gemini calls.
+    """
+    logger.info("Inference loop started")
+    slots = asyncio.Semaphore(_MAX_INFLIGHT_INFERENCES)
+    pending: set[asyncio.Task] = set()
+    seq = 0
+    last_dispatched = 0
+
+    async def run_one(tick_seq: int) -> None:
+        nonlocal last_dispatched
         try:
             result = await analyze_frame_async()
-            if result:
-                voice_prompt = result.get("voice_prompt", "")
-                haptic = int(result.get("haptic_intensity", 0))
-                await set_latest_analysis(result)
-                
-                # Send haptic feedback
-                await asyncio.to_thread(send_intensity, haptic)
-                
-                # Broadcast to WebSocket clients
-                await ws_manager.broadcast({
-                    "voice_prompt": voice_prompt,
-                    "detections": result.get("detections", []),
-                    "haptic_intensity": haptic,
-                    "ts": result.get("ts", time.time()),
-                })
-                
-                # Trigger TTS if needed
-                if voice_prompt:
-                    asyncio.create_task(speak(voice_prompt))
-                    
+            # Drop results that finish after a newer frame's result.
+            if result and tick_seq > last_dispatched:
+                last_dispatched = tick_seq
+                await _dispatch_result(result)
         except Exception as e:
-            print(f"[Vision] Inference error: {e}")
-        
-        await asyncio.sleep(1.0)
+            logger.warning("Inference error: %s", e)
+        finally:
+            slots.release()
+
+    try:
+        while True:
+            tick_start = time.perf_counter()
+            await slots.acquire()
+            seq += 1
+            task = asyncio.create_task(run_one(seq))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+            sleep_for = _INFERENCE_INTERVAL_SECONDS - (time.perf_counter() - tick_start)
+            if sleep_for > 0:
+                await asyncio.sleep(sleep_for)
+    finally:
+        for task in pending:
+            task.cancel()
 
 
 # Store latest analysis result
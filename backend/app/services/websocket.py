@@ -1,41 +1,67 @@
 """WebSocket connection manager."""
 from __future__ import annotations
 
-import json
-from typing import Any, List
+import asyncio
+import time
+from typing import Any, Optional, Set
 
+import orjson
 from fastapi import WebSocket
 
 
+# Unchanged results are re-sent in full at most this often; in between,
+# clients get a small keepalive instead.
+_FULL_RESEND_INTERVAL = 2.0
+
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time updates."""
 
     def __init__(self) -> None:
-        self._connections: List[WebSocket] = []
+        self._connections: Set[WebSocket] = set()
+        self._last_hash: Optional[int] = None
+        self._last_full_ts = 0.0
 
     async def connect(self, ws: WebSocket) -> None:
         """Accept and track a new WebSocket connection."""
         await ws.accept()
-        self._connections.append(ws)
+        self._connections.add(ws)
+        # Make sure the newcomer gets a full result on the next broadcast.
+        self._last_hash = None
         print(f"[WebSocket] Client connected. Total: {len(self._connections)}")
 
     def disconnect(self, ws: WebSocket) -> None:
         """Remove a WebSocket connection."""
-        if ws in self._connections:
-            self._connections.remove(ws)
+        self._connections.discard(ws)
         print(f"[WebSocket] Client disconnected. Total: {len(self._connections)}")
 
     async def broadcast(self, data: dict[str, Any]) -> None:
-        """Broadcast data to all connected clients."""
-        payload = json.dumps(data)
-        stale: List[WebSocket] = []
-        for ws in self._connections:
-            try:
-                await ws.send_text(payload)
-            except Exception:
-                stale.append(ws)
-        for ws in stale:
-            self.disconnect(ws)
+        """Broadcast data to all connected clients concurrently."""
+        # Snapshot up front: connect/disconnect may run while sends are awaited.
+        targets = tuple(self._connections)
+        if not targets:
+            return
+
+        now = time.time()
+        # The timestamp changes every tick, so compare the content without it.
+        content_hash = hash(
+            orjson.dumps({k: v for k, v in data.items() if k != "ts"}, option=orjson.OPT_SORT_KEYS)
+        )
+        if content_hash == self._last_hash and now - self._last_full_ts < _FULL_RESEND_INTERVAL:
+            data = {"ts": now, "keepalive": True}
+        else:
+            self._last_hash = content_hash
+            self._last_full_ts = now
+
+        # Serialized once; sent as text so browser clients can JSON.parse it.
+        payload = orjson.dumps(data).decode()
+        results = await asyncio.gather(
+            *(ws.send_text(payload) for ws in targets),
+            return_exceptions=True,
+        )
+        for ws, result in zip(targets, results):
+            if isinstance(result, Exception):
+                self.disconnect(ws)
 
     @property
     def connection_count(self) -> int:
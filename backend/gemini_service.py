@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import asyncio
-import base64
-import json
+import datetime
 import logging
 import time
 from typing import Any
 
+import cv2
 import google.generativeai as genai
+import numpy as np
+import orjson
 
+from app.services.detections import estimate_haptic, sanitize, strip_code_fence
+from app.services.frame_buffer import encode_jpeg
 from config import (
     ALLOW_SIMULATED_INFERENCE,
     GEMINI_API_KEY,
@@ -18,15 +22,41 @@ from config import (
 
 logger = logging.getLogger("echo-sight.gemini")
 
+GEMINI_MODEL = "gemini-2.0-flash"
+GENERATION_CONFIG = {"temperature": 0.1, "max_output_tokens": 400}
+CONTEXT_CACHE_TTL_SECONDS = 3600
+CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = 120
+MAX_INFLIGHT_INFERENCES = 4
+ANALYZE_PROMPT = "Analyze nearby obstacles and output JSON only."
+# Gemini resamples images to about this size anyway; larger frames are
+# shrunk before upload. Boxes are on a 0-1000 grid, so scale is irrelevant.
+UPLOAD_MAX_DIM = 768
+UPLOAD_JPEG_QUALITY = 60
+
+
+def _downscale_jpeg(frame: np.ndarray) -> bytes | None:
+    height, width = frame.shape[:2]
+    scale = UPLOAD_MAX_DIM / max(height, width)
+    small = cv2.resize(
+        frame,
+        (max(1, int(width * scale)), max(1, int(height * scale))),
+        interpolation=cv2.INTER_AREA,
+    )
+    return encode_jpeg(small, UPLOAD_JPEG_QUALITY)
+
 
 class GeminiService:
     """Low-speed (1 FPS) scene understanding loop using Gemini 2.0 Flash."""
 
     def __init__(self) -> None:
         self._model: Any = None
+        self._model_expires_at = float("inf")
+        # Serializes rebuilds so overlapping inferences create one cache.
+        self._model_lock = asyncio.Lock()
         self._pipeline = None
         self._running = False
         self._tick = 0
+        self._last_dispatched_seq = 0
         self.on_result = None  # async callable(result_dict)
 
     @property
@@ -42,44 +72,97 @@ class GeminiService:
             return
 
         genai.configure(api_key=GEMINI_API_KEY)
-        self._model = genai.GenerativeModel(
-            model_name="gemini-2.0-flash",
-            system_instruction=GEMINI_SYSTEM_INSTRUCTION,
-            generation_config={"temperature": 0.1, "max_output_tokens": 400},
-        )
+        self._build_model()
         logger.info("Gemini 2.0 Flash configured.")
 
+    def _build_model(self) -> None:
+        """Serve the static system instruction from an explicit context cache.
+
+        Falls back to sending it inline when caching is unavailable (e.g. the
+        prompt is below the model's minimum cacheable size). The cache being
+        replaced is left to expire on its own: inferences already in flight
+        may still be using it, and it lapses within the refresh margin.
+        """
+        try:
+            cache = genai.caching.CachedContent.create(
+                model=f"models/{GEMINI_MODEL}",
+                system_instruction=GEMINI_SYSTEM_INSTRUCTION,
+                ttl=datetime.timedelta(seconds=CONTEXT_CACHE_TTL_SECONDS),
+            )
+            self._model = genai.GenerativeModel.from_cached_content(
+                cache, generation_config=GENERATION_CONFIG
+            )
+            self._model_expires_at = (
+                time.monotonic()
+                + CONTEXT_CACHE_TTL_SECONDS
+                - CONTEXT_CACHE_REFRESH_MARGIN_SECONDS
+            )
+            logger.info("Gemini system instruction served from context cache %s.", cache.name)
+        except Exception as exc:
+            logger.warning("Gemini context cache unavailable, using inline instruction: %s", exc)
+            self._model = genai.GenerativeModel(
+                model_name=GEMINI_MODEL,
+                system_instruction=GEMINI_SYSTEM_INSTRUCTION,
+                generation_config=GENERATION_CONFIG,
+            )
+            self._model_expires_at = float("inf")
+
     def set_pipeline(self, pipeline) -> None:
         self._pipeline = pipeline
 
     async def start_inference_loop(self) -> None:
         self._running = True
+        self._last_dispatched_seq = 0
         interval_sec = max(0.2, INFERENCE_INTERVAL_MS / 1000.0)
-        logger.info("Inference loop running every %.2fs.", interval_sec)
-
-        while self._running:
-            loop_start = time.perf_counter()
-            try:
-                result = await self._infer_once()
-                if result:
-                    if self._pipeline:
-                        self._pipeline.set_detections(result)
-                    if self.on_result:
-                        await self.on_result(result)
-            except Exception as exc:
-                logger.exception("Inference loop error: %s", exc)
-
-            elapsed = time.perf_counter() - loop_start
-            sleep_for = interval_sec - elapsed
-            if sleep_for > 0:
-                await asyncio.sleep(sleep_for)
+        logger.info(
+            "Inference loop running every %.2fs (max %d in flight).",
+            interval_sec,
+            MAX_INFLIGHT_INFERENCES,
+        )
+
+        # Ticks are submitted on a fixed cadence without waiting for earlier
+        # Gemini calls; the semaphore bounds how many overlap.
+        slots = asyncio.Semaphore(MAX_INFLIGHT_INFERENCES)
+        pending: set[asyncio.Task] = set()
+        seq = 0
+        try:
+            while self._running:
+                loop_start = time.perf_counter()
+                await slots.acquire()
+                seq += 1
+                task = asyncio.create_task(self._infer_and_dispatch(seq, slots))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+                elapsed = time.perf_counter() - loop_start
+                sleep_for = interval_sec - elapsed
+                if sleep_for > 0:
+                    await asyncio.sleep(sleep_for)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _infer_and_dispatch(self, seq: int, slots: asyncio.Semaphore) -> None:
+        try:
+            result = await self._infer_once()
+            # Responses can complete out of order; never let an older frame
+            # overwrite a newer result.
+            if result and seq > self._last_dispatched_seq:
+                self._last_dispatched_seq = seq
+                if self._pipeline:
+                    self._pipeline.set_detections(result)
+                if self.on_result:
+                    await self.on_result(result)
+        except Exception as exc:
+            logger.exception("Inference loop error: %s", exc)
+        finally:
+            slots.release()
 
     async def _infer_once(self) -> dict[str, Any] | None:
         if self._pipeline is None:
             return None
 
-        frame_b64 = self._pipeline.get_frame_base64()
-        if not frame_b64:
+        if not self._pipeline.get_jpeg():
             return None
 
         if self._model is None:
@@ -87,7 +170,17 @@ class GeminiService:
                 return None
             return self._simulated_result()
 
-        raw_response = await asyncio.to_thread(self._call_gemini, frame_b64)
+        if time.monotonic() >= self._model_expires_at:
+            async with self._model_lock:
+                # Re-check: a concurrent inference may have just rebuilt it.
+                if time.monotonic() >= self._model_expires_at:
+                    await asyncio.to_thread(self._build_model)
+
+        frame_jpeg = await self._upload_jpeg()
+        if not frame_jpeg:
+            return None
+
+        raw_response = await self._call_gemini(frame_jpeg)
         if not raw_response:
             return None
 
@@ -98,123 +191,44 @@ class GeminiService:
         parsed["ts"] = time.time()
         return parsed
 
-    def _call_gemini(self, frame_b64: str) -> str | None:
+    async def _upload_jpeg(self) -> bytes | None:
+        """Reuse the stream JPEG unless the frame is larger than Gemini needs."""
+        assert self._pipeline is not None
+        frame = self._pipeline.get_frame()
+        if frame is None or max(frame.shape[:2]) <= UPLOAD_MAX_DIM:
+            return self._pipeline.get_jpeg()
+        return await asyncio.to_thread(_downscale_jpeg, frame)
+
+    async def _call_gemini(self, frame_jpeg: bytes) -> str | None:
         try:
             assert self._model is not None
-            image_bytes = base64.b64decode(frame_b64)
-            response = self._model.generate_content(
-                [
-                    {"mime_type": "image/jpeg", "data": image_bytes},
-                    "Analyze nearby obstacles and output JSON only.",
-                ]
+            # Stream on the event loop: no worker thread is parked for the
+            # duration of the request, and chunks are collected as they land.
+            response = await self._model.generate_content_async(
+                [{"mime_type": "image/jpeg", "data": frame_jpeg}, ANALYZE_PROMPT],
+                stream=True,
             )
-            text = getattr(response, "text", None)
-            return text.strip() if text else None
+            chunks: list[str] = []
+            async for chunk in response:
+                text = getattr(chunk, "text", None)
+                if text:
+                    chunks.append(text)
+            text = "".join(chunks).strip()
+            return text or None
         except Exception as exc:
             logger.error("Gemini API error: %s", exc)
             return None
 
     def _parse_response(self, text: str) -> dict[str, Any] | None:
-        cleaned = text.strip()
-        if cleaned.startswith("```"):
-            lines = cleaned.splitlines()
-            lines = [line for line in lines if not line.strip().startswith("```")]
-            cleaned = "\n".join(lines).strip()
+        cleaned = strip_code_fence(text)
 
         try:
-            payload = json.loads(cleaned)
-        except json.JSONDecodeError:
+            payload = orjson.loads(cleaned)
+        except orjson.JSONDecodeError:
             logger.warning("Gemini returned non-JSON payload: %s", cleaned[:200])
             return None
 
-        return self._sanitize_payload(payload)
-
-    def _sanitize_payload(self, payload: Any) -> dict[str, Any] | None:
-        if not isinstance(payload, dict):
-            return None
-
-        voice_prompt = str(payload.get("voice_prompt", "Path is clear")).strip()
-        if not voice_prompt:
-            voice_prompt = "Path is clear"
-        words = voice_prompt.split()
-        if len(words) > 10:
-            voice_prompt = " ".join(words[:10])
-
-        detections_raw = payload.get("detections", [])
-        detections: list[dict[str, Any]] = []
-        if isinstance(detections_raw, list):
-            for item in detections_raw[:12]:
-                normalized = self._normalize_detection(item)
-                if normalized is not None:
-                    detections.append(normalized)
-
-        haptic_intensity = self._normalize_haptic(payload.get("haptic_intensity"), detections)
-
-        return {
-            "voice_prompt": voice_prompt,
-            "detections": detections,
-            "haptic_intensity": haptic_intensity,
-        }
-
-    def _normalize_detection(self, item: Any) -> dict[str, Any] | None:
-        if isinstance(item, dict):
-            label = str(item.get("label", "obstacle")).strip() or "obstacle"
-            box = item.get("box")
-        elif isinstance(item, (list, tuple)):
-            label = "obstacle"
-            box = item
-        else:
-            return None
-
-        normalized_box = self._normalize_box(box)
-        if normalized_box is None:
-            return None
-
-        return {"label": label[:40], "box": normalized_box}
-
-    @staticmethod
-    def _normalize_box(box: Any) -> list[int] | None:
-        if not isinstance(box, (list, tuple)) or len(box) != 4:
-            return None
-
-        try:
-            ymin, xmin, ymax, xmax = [int(float(v)) for v in box]
-        except (TypeError, ValueError):
-            return None
-
-        ymin = max(0, min(1000, ymin))
-        xmin = max(0, min(1000, xmin))
-        ymax = max(0, min(1000, ymax))
-        xmax = max(0, min(1000, xmax))
-
-        if ymax <= ymin or xmax <= xmin:
-            return None
-
-        return [ymin, xmin, ymax, xmax]
-
-    def _normalize_haptic(self, value: Any, detections: list[dict[str, Any]]) -> int:
-        try:
-            numeric = int(value)
-        except (TypeError, ValueError):
-            numeric = self._estimate_haptic_from_detections(detections)
-
-        return max(0, min(255, numeric))
-
-    @staticmethod
-    def _estimate_haptic_from_detections(detections: list[dict[str, Any]]) -> int:
-        if not detections:
-            return 0
-
-        strongest_score = 0.0
-        for det in detections:
-            ymin, xmin, ymax, xmax = det["box"]
-            area = max(1, (ymax - ymin) * (xmax - xmin))
-            size_score = min(1.0, area / 250_000.0)
-            ground_score = min(1.0, ymax / 1000.0)
-            score = min(1.0, (0.65 * size_score) + (0.35 * ground_score))
-            strongest_score = max(strongest_score, score)
-
-        return int(strongest_score * 255)
+        return sanitize(payload)
 
     def _simulated_result(self) -> dict[str, Any]:
         self._tick += 1
@@ -235,7 +249,7 @@ class GeminiService:
         clock = self._clock_direction(center_x)
         voice = f"Obstacle at {clock} o'clock"
         detections = [{"label": "obstacle", "box": box}]
-        intensity = self._estimate_haptic_from_detections(detections)
+        intensity = estimate_haptic(detections)
 
         return {
             "voice_prompt": voice,
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import queue
 import threading
 
 import serial
@@ -9,6 +10,9 @@ from config import SERIAL_BAUD, SERIAL_PORT
 
 logger = logging.getLogger("echo-sight.haptic")
 
+# Pause before retrying a byte the non-blocking UART did not accept.
+WRITE_RETRY_SECONDS = 0.005
+
 
 class HapticService:
     """Writes a single 0-255 PWM intensity byte to ESP32 over serial."""
@@ -18,6 +22,10 @@ class HapticService:
         self._connected = False
         self._lock = threading.Lock()
         self._last_intensity = 0
+        self._last_sent: int | None = None
+        # Intensities for the writer thread; None is the stop sentinel.
+        self._queue: queue.SimpleQueue[int | None] = queue.SimpleQueue()
+        self._writer_thread: threading.Thread | None = None
 
     @property
     def connected(self) -> bool:
@@ -34,15 +42,26 @@ class HapticService:
             return
 
         try:
-            self._serial = serial.Serial(SERIAL_PORT, SERIAL_BAUD, timeout=0.2)
+            # Non-blocking: a byte the UART cannot take right now is dropped,
+            # the next intensity supersedes it anyway.
+            self._serial = serial.Serial(SERIAL_PORT, SERIAL_BAUD, timeout=0, write_timeout=0)
             self._connected = True
+            self._last_sent = None
             logger.info("Haptic serial connected: %s @ %d", SERIAL_PORT, SERIAL_BAUD)
         except serial.SerialException as exc:
             self._serial = None
             self._connected = False
             logger.warning("Serial connection failed: %s. Running in simulated mode.", exc)
+            return
+
+        if self._writer_thread is None or not self._writer_thread.is_alive():
+            self._writer_thread = threading.Thread(
+                target=self._writer_loop, name="haptic-writer", daemon=True
+            )
+            self._writer_thread.start()
 
     def send_intensity(self, intensity: int) -> None:
+        """Queue an intensity for the writer thread; never blocks the caller."""
         value = max(0, min(255, int(intensity)))
         self._last_intensity = value
 
@@ -50,18 +69,60 @@ class HapticService:
             logger.debug("Haptic simulated value: %d", value)
             return
 
+        self._queue.put_nowait(value)
+
+    def _writer_loop(self) -> None:
+        retry: int | None = None
+        while True:
+            try:
+                value = self._queue.get(timeout=None if retry is None else WRITE_RETRY_SECONDS)
+            except queue.Empty:
+                value = retry
+            if value is None:
+                return
+            # Only the newest queued intensity matters; skip the backlog.
+            while True:
+                try:
+                    newer = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if newer is None:
+                    return
+                value = newer
+            # A byte the UART refused is retried unless a newer one arrives;
+            # a dropped final 0 would leave the motor running.
+            retry = None if self._write(value) else value
+
+    def _write(self, value: int) -> bool:
+        """Write ``value``; False only if the UART did not accept it yet."""
+        # The ESP32 holds the last PWM level, so repeats are pure overhead.
+        if value == self._last_sent:
+            return True
+
         with self._lock:
+            if self._serial is None:
+                return True
             try:
-                self._serial.write(bytes([value]))
-                self._serial.flush()
+                written = self._serial.write(bytes([value]))
+            except (BlockingIOError, serial.SerialTimeoutException):
+                return False
             except serial.SerialException as exc:
                 logger.error("Serial write failed: %s", exc)
                 self._connected = False
+                return True
+            if written != 1:
+                return False
+            self._last_sent = value
+            return True
 
     def disconnect(self) -> None:
+        if self._writer_thread is not None:
+            self._queue.put_nowait(None)
+            self._writer_thread.join(timeout=1.0)
+            self._writer_thread = None
         with self._lock:
             if self._serial is not None and self._serial.is_open:
                 self._serial.close()
-        self._serial = None
+            self._serial = None
         self._connected = False
         logger.info("Haptic serial disconnected.")
@@ -1,16 +1,18 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 from contextlib import asynccontextmanager, suppress
 from pathlib import Path
+from typing import Any
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import orjson
+from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 
 from app.database import Base, engine
+from app.models import VoiceProfile
 from app.routers import auth
 from app.routers.haptic import router as app_haptic_router
 from app.routers.stream import router as app_stream_router
@@ -19,8 +21,8 @@ from app.routers.vision import router as app_vision_router
 from app.routers.voice_studio import router as app_voice_studio_router
 from app.routers.gemini_live import router as gemini_live_router
 from app.services import close_haptic as app_close_haptic
+from app.services import close_tts as app_close_tts
 from app.services import frame_buffer as app_frame_buffer
-from app.services.vision import inference_loop as app_inference_loop
 from config import CAPTURE_FPS, CORS_ORIGINS, ESP32_CAM_URL, INFERENCE_INTERVAL_MS
 from gemini_service import GeminiService
 from haptic_service import HapticService
@@ -33,45 +35,100 @@ logging.basicConfig(
 )
 logger = logging.getLogger("echo-sight")
 
+WS_SEND_TIMEOUT_SECONDS = 2.0
+WS_CLIENT_QUEUE_SIZE = 8
+WS_BATCH_WINDOW_SECONDS = 0.03
+WS_BROADCAST_QUEUE_SIZE = 256
+
 
 class WebSocketHub:
+    """Each client gets a small outbox drained by its own sender task.
+
+    broadcast only enqueues, so a saturated socket backs up its own queue
+    (oldest messages are dropped) instead of the inference loop. Payloads
+    arriving within one batch window go out as a single JSON array frame.
+    """
+
     def __init__(self) -> None:
-        self._clients: set[WebSocket] = set()
-        self._lock = asyncio.Lock()
+        self._clients: dict[WebSocket, tuple[asyncio.Queue[str], asyncio.Task]] = {}
+        self._last_message: str | None = None
+        self._pending: asyncio.Queue[dict] = asyncio.Queue(maxsize=WS_BROADCAST_QUEUE_SIZE)
+        self._batch_task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._batch_task is None:
+            self._batch_task = asyncio.create_task(self._batch_worker(), name="ws-batcher")
+
+    async def stop(self) -> None:
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._batch_task
+            self._batch_task = None
 
     async def connect(self, ws: WebSocket) -> None:
         await ws.accept()
-        async with self._lock:
-            self._clients.add(ws)
-            total = len(self._clients)
-        logger.info("WebSocket connected. Clients=%d", total)
-
-    async def disconnect(self, ws: WebSocket) -> None:
-        async with self._lock:
-            self._clients.discard(ws)
-            total = len(self._clients)
-        logger.info("WebSocket disconnected. Clients=%d", total)
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=WS_CLIENT_QUEUE_SIZE)
+        task = asyncio.create_task(self._sender(ws, queue), name="ws-sender")
+        self._clients[ws] = (queue, task)
+        logger.info("WebSocket connected. Clients=%d", len(self._clients))
+
+    def disconnect(self, ws: WebSocket) -> None:
+        entry = self._clients.pop(ws, None)
+        if entry is None:
+            return
+        entry[1].cancel()
+        logger.info("WebSocket disconnected. Clients=%d", len(self._clients))
+
+    def send(self, ws: WebSocket, message: str) -> None:
+        entry = self._clients.get(ws)
+        if entry is not None:
+            self._enqueue(entry[0], message)
 
     async def broadcast(self, payload: dict) -> None:
-        message = json.dumps(payload)
-        async with self._lock:
-            targets = list(self._clients)
+        self._enqueue(self._pending, payload)
 
-        stale: list[WebSocket] = []
-        for ws in targets:
-            try:
-                await ws.send_text(message)
-            except Exception:
-                stale.append(ws)
-
-        if stale:
-            async with self._lock:
-                for ws in stale:
-                    self._clients.discard(ws)
-
-    async def count(self) -> int:
-        async with self._lock:
-            return len(self._clients)
+    async def _batch_worker(self) -> None:
+        while True:
+            items = [await self._pending.get()]
+            await asyncio.sleep(WS_BATCH_WINDOW_SECONDS)
+            while True:
+                try:
+                    items.append(self._pending.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            self._fan_out(items[0] if len(items) == 1 else items)
+
+    def _fan_out(self, payload: dict | list[dict]) -> None:
+        # Text frames: the dashboard JSON.parses event.data.
+        message = orjson.dumps(payload).decode()
+        if message == self._last_message:
+            return
+        self._last_message = message
+        for queue, _ in list(self._clients.values()):
+            self._enqueue(queue, message)
+
+    def count(self) -> int:
+        return len(self._clients)
+
+    @staticmethod
+    def _enqueue(queue: asyncio.Queue, message: Any) -> None:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def _sender(self, ws: WebSocket, queue: asyncio.Queue[str]) -> None:
+        try:
+            while True:
+                message = await queue.get()
+                await asyncio.wait_for(ws.send_text(message), timeout=WS_SEND_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # WebSocketDisconnect, timeout, closed transport
+            if self._clients.pop(ws, None) is not None:
+                logger.info("WebSocket dropped. Clients=%d", len(self._clients))
 
 
 pipeline = VisionPipeline(source=ESP32_CAM_URL, target_fps=CAPTURE_FPS)
@@ -80,44 +137,51 @@ haptic = HapticService()
 tts = TTSService()
 ws_hub = WebSocketHub()
 
-_inference_task: asyncio.Task | None = None
-_app_inference_task: asyncio.Task | None = None
+DASHBOARD_PATH = Path(__file__).parent / "static" / "dashboard.html"
 
+_dashboard_response: HTMLResponse | None = None
 
-async def on_inference_result(result: dict) -> None:
-    await ws_hub.broadcast(result)
 
-    intensity = result.get("haptic_intensity", 0)
-    await asyncio.to_thread(haptic.send_intensity, intensity)
+async def on_inference_result(result: dict) -> None:
+    # Non-blocking: hands the value to the haptic writer thread.
+    try:
+        haptic.send_intensity(result.get("haptic_intensity", 0))
+    except Exception as exc:
+        logger.error("Haptic dispatch failed: %s", exc)
 
+    sinks = [ws_hub.broadcast(result)]
     voice_prompt = str(result.get("voice_prompt", "")).strip()
     if voice_prompt:
-        await tts.enqueue(voice_prompt)
+        sinks.append(tts.enqueue(voice_prompt))
+
+    # Independent sinks: one failing must not hold up or suppress the other.
+    for outcome in await asyncio.gather(*sinks, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            logger.error("Inference result dispatch failed: %s", outcome)
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    global _inference_task, _app_inference_task
+    global _dashboard_response
 
     logger.info("Starting Echo-Sight backend...")
+    if DASHBOARD_PATH.exists():
+        # Encoded once; the same response object is served on every hit.
+        _dashboard_response = HTMLResponse(DASHBOARD_PATH.read_bytes())
     gemini.configure()
     gemini.set_pipeline(pipeline)
     gemini.on_result = on_inference_result
 
     Base.metadata.create_all(bind=engine)
+    # create_all does not add new indexes to tables that already exist.
+    for index in VoiceProfile.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
 
     pipeline.start()
     app_frame_buffer.start()
     haptic.connect()
     await tts.start()
-
-    # Legacy inference loops disabled – Gemini Live API replaces them.
-    # _inference_task = asyncio.create_task(
-    #     gemini.start_inference_loop(), name="gemini-inference-loop"
-    # )
-    # _app_inference_task = asyncio.create_task(
-    #     app_inference_loop(), name="app-inference-loop"
-    # )
+    ws_hub.start()
 
     logger.info("Echo-Sight backend is live.")
     yield
@@ -125,23 +189,13 @@ async def lifespan(_: FastAPI):
     logger.info("Shutting down Echo-Sight backend...")
     gemini.stop()
 
-    if _inference_task is not None:
-        _inference_task.cancel()
-        with suppress(asyncio.CancelledError):
-            await _inference_task
-        _inference_task = None
-
-    if _app_inference_task is not None:
-        _app_inference_task.cancel()
-        with suppress(asyncio.CancelledError):
-            await _app_inference_task
-        _app_inference_task = None
-
     pipeline.stop()
     app_frame_buffer.stop()
     haptic.disconnect()
     app_close_haptic()
+    await app_close_tts()
     await tts.stop()
+    await ws_hub.stop()
 
 
 app = FastAPI(
@@ -179,13 +233,19 @@ async def health() -> JSONResponse:
             "gemini_enabled": gemini.enabled,
             "serial_connected": haptic.connected,
             "last_haptic_intensity": haptic.last_intensity,
-            "ws_clients": await ws_hub.count(),
+            "ws_clients": ws_hub.count(),
         }
     )
 
 
 @app.get("/video_feed")
-async def video_feed() -> StreamingResponse:
+async def video_feed(action: str | None = None) -> Response:
+    # ?action=snapshot lets clients on flaky links pull single frames instead.
+    if action == "snapshot":
+        jpeg = pipeline.get_jpeg()
+        if jpeg is None:
+            return Response(status_code=204)
+        return Response(content=jpeg, media_type="image/jpeg", headers={"Cache-Control": "no-store"})
     return StreamingResponse(
         generate_mjpeg(pipeline),
         media_type="multipart/x-mixed-replace; boundary=frame",
@@ -193,8 +253,8 @@ async def video_feed() -> StreamingResponse:
 
 
 @app.get("/detections")
-async def detections() -> JSONResponse:
-    return JSONResponse(pipeline.get_latest_detections())
+async def detections() -> Response:
+    return Response(content=pipeline.get_latest_detections_json(), media_type="application/json")
 
 
 @app.get("/audio/latest")
@@ -208,24 +268,23 @@ async def latest_audio() -> Response:
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket) -> None:
     await ws_hub.connect(ws)
-    await ws.send_text(json.dumps(pipeline.get_latest_detections()))
+    ws_hub.send(ws, pipeline.get_latest_detections_json().decode())
 
     try:
-        while True:
-            await ws.receive_text()
-    except WebSocketDisconnect:
-        pass
+        # Nothing is expected from clients; drain raw ASGI messages without
+        # decoding them and stop at the disconnect event.
+        while (await ws.receive())["type"] != "websocket.disconnect":
+            pass
     finally:
-        await ws_hub.disconnect(ws)
+        ws_hub.disconnect(ws)
 
 
 @app.get("/", response_class=HTMLResponse)
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard() -> HTMLResponse:
-    html_path = Path(__file__).parent / "static" / "dashboard.html"
-    if not html_path.exists():
+    if _dashboard_response is None:
         return HTMLResponse("<h1>Dashboard not found</h1>", status_code=404)
-    return HTMLResponse(html_path.read_text(encoding="utf-8"))
+    return _dashboard_response
 
 
 if __name__ == "__main__":
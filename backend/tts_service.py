@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections import OrderedDict
 from contextlib import suppress
 
 import httpx
@@ -17,6 +18,9 @@ from config import (
 
 logger = logging.getLogger("echo-sight.tts")
 
+AUDIO_CACHE_MAX_ENTRIES = 64
+STREAM_URL = f"{ELEVENLABS_TTS_URL}/{ELEVENLABS_VOICE_ID}/stream"
+
 
 class TTSService:
     """Async queue worker for low-latency ElevenLabs Flash v2.5 synthesis."""
@@ -25,24 +29,48 @@ class TTSService:
         self._client: httpx.AsyncClient | None = None
         self._running = False
         self._worker_task: asyncio.Task | None = None
+        self._warm_task: asyncio.Task | None = None
         self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=8)
         self._last_prompt = ""
         self._latest_audio: bytes | None = None
         self._audio_lock = asyncio.Lock()
+        # Recent prompts ("Path is clear", ...) recur constantly; replay them.
+        self._audio_cache: OrderedDict[str, bytes] = OrderedDict()
 
     async def start(self) -> None:
         if self._running:
             return
-        self._client = httpx.AsyncClient(timeout=httpx.Timeout(8.0, connect=2.0))
+        # One pooled HTTP/2 client for the service lifetime, so each prompt
+        # reuses the open TLS connection instead of handshaking again.
+        self._client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(8.0, connect=2.0),
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4, keepalive_expiry=120.0),
+            headers={
+                "xi-api-key": ELEVENLABS_API_KEY,
+                "Content-Type": "application/json",
+                "Accept": "audio/mpeg",
+            },
+            params={
+                "output_format": ELEVENLABS_OUTPUT_FORMAT,
+                "optimize_streaming_latency": ELEVENLABS_OPTIMIZE_STREAMING_LATENCY,
+            },
+        )
         self._running = True
         self._worker_task = asyncio.create_task(self._worker(), name="tts-worker")
         logger.info("TTS service started.")
         if not ELEVENLABS_API_KEY:
             logger.info("TTS running in simulation mode (ELEVENLABS_API_KEY missing).")
+        else:
+            self._warm_task = asyncio.create_task(self._warm_connection(), name="tts-warmup")
 
     async def stop(self) -> None:
         self._running = False
 
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+            self._warm_task = None
+
         if self._worker_task is not None:
             self._worker_task.cancel()
             with suppress(asyncio.CancelledError):
@@ -55,6 +83,15 @@ class TTSService:
 
         logger.info("TTS service stopped.")
 
+    async def _warm_connection(self) -> None:
+        """Open the pooled TLS connection now so the first prompt skips the handshake."""
+        assert self._client is not None
+        try:
+            # Any status will do; only the established connection matters.
+            await self._client.head(STREAM_URL)
+        except httpx.HTTPError as exc:
+            logger.debug("TTS connection warm-up failed: %s", exc)
+
     async def speak(self, text: str) -> None:
         await self.enqueue(text)
 
@@ -97,16 +134,13 @@ class TTSService:
         if self._client is None:
             return
 
-        url = f"{ELEVENLABS_TTS_URL}/{ELEVENLABS_VOICE_ID}/stream"
-        headers = {
-            "xi-api-key": ELEVENLABS_API_KEY,
-            "Content-Type": "application/json",
-            "Accept": "audio/mpeg",
-        }
-        params = {
-            "output_format": ELEVENLABS_OUTPUT_FORMAT,
-            "optimize_streaming_latency": ELEVENLABS_OPTIMIZE_STREAMING_LATENCY,
-        }
+        cached = self._audio_cache.get(text)
+        if cached is not None:
+            self._audio_cache.move_to_end(text)
+            async with self._audio_lock:
+                self._latest_audio = cached
+            return
+
         payload = {
             "text": text,
             "model_id": ELEVENLABS_MODEL,
@@ -118,9 +152,7 @@ class TTSService:
             },
         }
 
-        response = await self._client.post(
-            url, headers=headers, params=params, json=payload
-        )
+        response = await self._client.post(STREAM_URL, json=payload)
         if response.status_code != 200:
             logger.warning(
                 "ElevenLabs error %s: %s",
@@ -129,7 +161,12 @@ class TTSService:
             )
             return
 
+        audio = response.content
+        self._audio_cache[text] = audio
+        if len(self._audio_cache) > AUDIO_CACHE_MAX_ENTRIES:
+            self._audio_cache.popitem(last=False)
+
         async with self._audio_lock:
-            self._latest_audio = response.content
+            self._latest_audio = audio
 
         logger.info("TTS generated for prompt: %s", text)
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
-import base64
-import copy
+import asyncio
 import logging
 import threading
 import time
@@ -9,9 +8,15 @@ from typing import Any
 
 import cv2
 import numpy as np
+import orjson
+
+from app.services.frame_buffer import encode_jpeg
 
 logger = logging.getLogger("echo-sight.vision")
 
+MJPEG_MIN_FPS = 1.0
+PLACEHOLDER_ACCENT = (0, 255, 208)
+
 
 class VisionPipeline:
     """High-speed capture pipeline for latest-frame access and MJPEG streaming."""
@@ -29,20 +34,44 @@ class VisionPipeline:
 
         self._cap: cv2.VideoCapture | None = None
         self._capture_thread: threading.Thread | None = None
+        self._encode_thread: threading.Thread | None = None
         self._running = False
 
-        self._frame_lock = threading.Lock()
-        self._latest_frame: np.ndarray | None = None
-        self._latest_jpeg: bytes | None = None
-        self._last_frame_ts = 0.0
-
+        # Triple buffer of immutable (frame, jpeg, ts) snapshots. The encode
+        # thread fills the slot after the published one and then swaps the
+        # index (a single GIL-atomic store), so readers never take a lock
+        # and never see a half-written slot.
+        self._slots: list[tuple[np.ndarray, bytes, float] | None] = [None, None, None]
+        self._latest_idx = 0
+
+        # One-slot handoff from the capture thread to the encode thread;
+        # an unencoded frame is simply replaced by a newer one.
+        self._raw_lock = threading.Lock()
+        self._latest_raw: np.ndarray | None = None
+        self._raw_ready = threading.Event()
+        # Set by the encode thread when it is ready for another live frame;
+        # only then does the capture thread pay for retrieve() (the decode).
+        self._frame_wanted = threading.Event()
+
+        # Stream clients waiting for the next encoded frame.
+        self._subscribers_lock = threading.Lock()
+        self._subscribers: dict[asyncio.Event, asyncio.AbstractEventLoop] = {}
+
+        # Stored pre-serialized: readers get bytes or a fresh parse, so no
+        # caller can mutate the shared snapshot.
         self._detections_lock = threading.Lock()
-        self._latest_detections: dict[str, Any] = {
-            "voice_prompt": "Path is clear",
-            "detections": [],
-            "haptic_intensity": 0,
-            "ts": time.time(),
-        }
+        self._latest_detections_json: bytes = orjson.dumps(
+            {
+                "voice_prompt": "Path is clear",
+                "detections": [],
+                "haptic_intensity": 0,
+                "ts": time.time(),
+            }
+        )
+
+        self._placeholder_base: np.ndarray | None = None
+        self._placeholder_frame: np.ndarray | None = None
+        self._placeholder_stamp = ""
 
         self._last_reconnect_attempt = 0.0
         self._last_read_error_log = 0.0
@@ -61,6 +90,7 @@ class VisionPipeline:
             return
 
         self._running = True
+        self._log_jpeg_backend()
         if self._placeholder_only:
             logger.info("Video source set to demo mode. Using placeholder frames only.")
         else:
@@ -68,79 +98,159 @@ class VisionPipeline:
         self._capture_thread = threading.Thread(
             target=self._capture_loop, name="vision-capture", daemon=True
         )
+        self._encode_thread = threading.Thread(
+            target=self._encode_loop, name="vision-encode", daemon=True
+        )
         self._capture_thread.start()
+        self._encode_thread.start()
         logger.info("Vision pipeline started at %d FPS target.", self._target_fps)
 
     def stop(self) -> None:
         self._running = False
-        if self._capture_thread and self._capture_thread.is_alive():
-            self._capture_thread.join(timeout=2.0)
+        self._raw_ready.set()
+        self._frame_wanted.set()
+        for thread in (self._capture_thread, self._encode_thread):
+            if thread and thread.is_alive():
+                thread.join(timeout=2.0)
         self._release_camera()
         logger.info("Vision pipeline stopped.")
 
     def get_frame(self) -> np.ndarray | None:
-        with self._frame_lock:
-            if self._latest_frame is None:
-                return None
-            return self._latest_frame.copy()
+        """Return the latest frame as a read-only view; copy it to modify.
+
+        Every capture produces a fresh array, so the buffer behind a view is
+        never written again once it has been published.
+        """
+        latest = self._slots[self._latest_idx]
+        if latest is None:
+            return None
+        view = latest[0].view()
+        view.flags.writeable = False
+        return view
 
     def get_jpeg(self) -> bytes | None:
-        with self._frame_lock:
-            return self._latest_jpeg
-
-    def get_frame_base64(self) -> str | None:
-        with self._frame_lock:
-            if self._latest_jpeg is None:
-                return None
-            return base64.b64encode(self._latest_jpeg).decode("ascii")
+        latest = self._slots[self._latest_idx]
+        return None if latest is None else latest[1]
 
     def set_detections(self, detections: dict[str, Any]) -> None:
+        encoded = orjson.dumps(detections)
         with self._detections_lock:
-            self._latest_detections = copy.deepcopy(detections)
+            self._latest_detections_json = encoded
 
     def get_latest_detections(self) -> dict[str, Any]:
+        return orjson.loads(self.get_latest_detections_json())
+
+    def get_latest_detections_json(self) -> bytes:
         with self._detections_lock:
-            return copy.deepcopy(self._latest_detections)
+            return self._latest_detections_json
+
+    def subscribe(self) -> asyncio.Event:
+        """Return an event that is set each time a new JPEG is published."""
+        event = asyncio.Event()
+        with self._subscribers_lock:
+            self._subscribers[event] = asyncio.get_running_loop()
+        return event
+
+    def unsubscribe(self, event: asyncio.Event) -> None:
+        with self._subscribers_lock:
+            self._subscribers.pop(event, None)
+
+    def _notify_subscribers(self) -> None:
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers.items())
+        for event, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # loop already closed
+                self.unsubscribe(event)
 
     def get_last_frame_timestamp(self) -> float:
-        with self._frame_lock:
-            return self._last_frame_ts
+        latest = self._slots[self._latest_idx]
+        return 0.0 if latest is None else latest[2]
 
     def _capture_loop(self) -> None:
         frame_interval = 1.0 / self._target_fps
-        encode_params = [cv2.IMWRITE_JPEG_QUALITY, self._jpeg_quality]
 
         while self._running:
-            loop_start = time.perf_counter()
-            frame = self._read_frame()
+            if self._grab_live_frame():
+                # grab() blocks until the source delivers, so this drains the
+                # stream at its own rate and the buffered frame is never stale.
+                continue
 
-            if frame is not None:
-                ok, jpeg = cv2.imencode(".jpg", frame, encode_params)
-                if ok:
-                    with self._frame_lock:
-                        self._latest_frame = frame
-                        self._latest_jpeg = jpeg.tobytes()
-                        self._last_frame_ts = time.time()
+            loop_start = time.perf_counter()
+            self._publish_raw(self._read_fallback_frame())
 
             elapsed = time.perf_counter() - loop_start
             sleep_for = frame_interval - elapsed
             if sleep_for > 0:
                 time.sleep(sleep_for)
 
-    def _read_frame(self) -> np.ndarray:
-        if self._placeholder_only:
-            return self._build_placeholder_frame()
+    def _grab_live_frame(self) -> bool:
+        cap = self._cap
+        if self._placeholder_only or cap is None or not cap.isOpened():
+            return False
+
+        if cap.grab():
+            if self._frame_wanted.is_set():
+                ok, frame = cap.retrieve()
+                if ok and frame is not None:
+                    self._frame_wanted.clear()
+                    self._publish_raw(frame)
+            return True
+
+        now = time.time()
+        if now - self._last_read_error_log >= 2.0:
+            logger.warning("Camera frame read failed. Reconnecting...")
+            self._last_read_error_log = now
+        self._release_camera()
+        return False
 
-        if self._cap is not None and self._cap.isOpened():
-            ok, frame = self._cap.read()
-            if ok and frame is not None:
-                return frame
+    def _publish_raw(self, frame: np.ndarray) -> None:
+        with self._raw_lock:
+            self._latest_raw = frame
+        self._raw_ready.set()
 
-            now = time.time()
-            if now - self._last_read_error_log >= 2.0:
-                logger.warning("Camera frame read failed. Reconnecting...")
-                self._last_read_error_log = now
-            self._release_camera()
+    def _encode_loop(self) -> None:
+        frame_interval = 1.0 / self._target_fps
+        next_due = time.perf_counter()
+
+        while self._running:
+            delay = next_due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            next_due = time.perf_counter() + frame_interval
+            self._frame_wanted.set()
+
+            if not self._raw_ready.wait(timeout=0.5):
+                continue
+            self._raw_ready.clear()
+            with self._raw_lock:
+                frame, self._latest_raw = self._latest_raw, None
+            if frame is None:
+                continue
+
+            # libjpeg-turbo via PyTurboJPEG when present, else a
+            # non-optimized, baseline cv2.imencode; both return bytes.
+            jpeg = encode_jpeg(frame, self._jpeg_quality)
+            if jpeg is None:
+                continue
+            slot = (self._latest_idx + 1) % len(self._slots)
+            self._slots[slot] = (frame, jpeg, time.time())
+            self._latest_idx = slot
+            self._notify_subscribers()
+
+    @staticmethod
+    def _log_jpeg_backend() -> None:
+        for line in cv2.getBuildInformation().splitlines():
+            if line.strip().startswith("JPEG:"):
+                backend = line.split(":", 1)[1].strip()
+                if "turbo" not in backend.lower():
+                    logger.warning("OpenCV JPEG codec is %s, not libjpeg-turbo; encodes will be slower.", backend)
+                return
+
+    def _read_fallback_frame(self) -> np.ndarray:
+        if self._placeholder_only:
+            return self._build_placeholder_frame()
 
         now = time.time()
         if now - self._last_reconnect_attempt >= 8.0:
@@ -194,14 +304,37 @@ class VisionPipeline:
     def _is_placeholder_source(source: str) -> bool:
         return str(source).strip().lower() in {"demo", "placeholder", "none", "off"}
 
+    def _build_placeholder_frame(self) -> np.ndarray:
+        # Published frames are never modified, so within one second the same
+        # stamped frame is handed out again instead of being redrawn.
+        stamp = time.strftime("%H:%M:%S")
+        if self._placeholder_frame is not None and self._placeholder_stamp == stamp:
+            return self._placeholder_frame
+
+        if self._placeholder_base is None:
+            self._placeholder_base = self._build_static_placeholder()
+        frame = self._placeholder_base.copy()
+        cv2.putText(
+            frame,
+            f"LOCAL TIME {stamp}",
+            (60, 705),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.8,
+            PLACEHOLDER_ACCENT,
+            2,
+            cv2.LINE_AA,
+        )
+        self._placeholder_frame = frame
+        self._placeholder_stamp = stamp
+        return frame
+
     @staticmethod
-    def _build_placeholder_frame() -> np.ndarray:
+    def _build_static_placeholder() -> np.ndarray:
         frame = np.zeros((720, 1280, 3), dtype=np.uint8)
         frame[:, :] = (6, 10, 12)
 
-        accent = (0, 255, 208)
+        accent = PLACEHOLDER_ACCENT
         dim = (0, 140, 120)
-        now = time.strftime("%H:%M:%S")
 
         cv2.putText(
             frame,
@@ -226,26 +359,42 @@ class VisionPipeline:
         cv2.rectangle(frame, (55, 250), (1225, 670), dim, 2)
         cv2.line(frame, (640, 250), (640, 670), dim, 1)
         cv2.line(frame, (55, 460), (1225, 460), dim, 1)
-        cv2.putText(
-            frame,
-            f"LOCAL TIME {now}",
-            (60, 705),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.8,
-            accent,
-            2,
-            cv2.LINE_AA,
-        )
         return frame
 
 
-def generate_mjpeg(pipeline: VisionPipeline):
-    """Yield an MJPEG multipart stream from latest encoded frames."""
-    while True:
-        jpeg = pipeline.get_jpeg()
-        if jpeg is not None:
+async def generate_mjpeg(pipeline: VisionPipeline):
+    """Yield an MJPEG multipart stream, one part per newly captured frame.
+
+    The generator sleeps until the capture thread publishes a frame, so a
+    frame is never sent twice and a slow client just skips to the latest.
+    The send rate also adapts: when handing a part to the client takes
+    longer than the frame interval the rate halves, and it climbs back
+    toward the pipeline target while writes are fast.
+    """
+    max_fps = float(pipeline.target_fps)
+    fps = max_fps
+    last_sent = 0.0
+    new_frame = pipeline.subscribe()
+    try:
+        while True:
+            await new_frame.wait()
+            new_frame.clear()
+            # 10% slack so capture jitter alone does not drop frames.
+            if fps < max_fps and time.perf_counter() - last_sent < 0.9 / fps:
+                continue
+            jpeg = pipeline.get_jpeg()
+            if jpeg is None:
+                continue
+
+            last_sent = time.perf_counter()
             yield (
                 b"--frame\r\n"
                 b"Content-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n"
             )
-        time.sleep(1.0 / pipeline.target_fps)
+            write_time = time.perf_counter() - last_sent
+            if write_time > 1.0 / fps:
+                fps = max(MJPEG_MIN_FPS, fps / 2.0)
+            elif write_time < 0.5 / fps and fps < max_fps:
+                fps = min(max_fps, fps * 1.25)
+    finally:
+        pipeline.unsubscribe(new_frame)
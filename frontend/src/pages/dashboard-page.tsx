@@ -578,31 +578,35 @@ export function DashboardPage() {
 
     socket.onmessage = (event) => {
       try {
-        const msg = JSON.parse(event.data as string)
-
-        if (msg.type === 'viewer_connected') {
-          if (msg.source_connected) {
+        // The relay may coalesce queued messages into one JSON array.
+        const parsed = JSON.parse(event.data as string)
+        const messages = Array.isArray(parsed) ? parsed : [parsed]
+
+        for (const msg of messages) {
+          if (msg.type === 'viewer_connected') {
+            if (msg.source_connected) {
+              setCameraOn(true)
+              addLog('Pi source already connected')
+            }
+          } else if (msg.type === 'source_connected') {
             setCameraOn(true)
-            addLog('Pi source already connected')
-          }
-        } else if (msg.type === 'source_connected') {
-          setCameraOn(true)
-          addLog('Pi source connected')
-        } else if (msg.type === 'source_disconnected') {
-          setHasPiPreview(false)
-          latestPiFrameRef.current = ''
-          if (piImageRef.current) piImageRef.current.src = ''
-          addLog('Pi source disconnected')
-        } else if (msg.type === 'video_preview') {
-          const b64 = String(msg.data || '')
-          if (!b64) return
-          latestPiFrameRef.current = b64
-          if (piImageRef.current) {
-            piImageRef.current.src = `data:image/jpeg;base64,${b64}`
+            addLog('Pi source connected')
+          } else if (msg.type === 'source_disconnected') {
+            setHasPiPreview(false)
+            latestPiFrameRef.current = ''
+            if (piImageRef.current) piImageRef.current.src = ''
+            addLog('Pi source disconnected')
+          } else if (msg.type === 'video_preview') {
+            const b64 = String(msg.data || '')
+            if (!b64) continue
+            latestPiFrameRef.current = b64
+            if (piImageRef.current) {
+              piImageRef.current.src = `data:image/jpeg;base64,${b64}`
+            }
+            setHasPiPreview(true)
+          } else if (msg.type === 'error') {
+            addLog(`Relay error: ${msg.message}`)
           }
-          setHasPiPreview(true)
-        } else if (msg.type === 'error') {
-          addLog(`Relay error: ${msg.message}`)
         }
       } catch {
         addLog('Malformed relay message')
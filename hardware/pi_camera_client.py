@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 import asyncio
-import base64
-import json
 import os
 import signal
 from pathlib import Path
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
 import cv2
+import numpy as np
+import orjson
 import websockets
 from websockets.exceptions import ConnectionClosed, ConnectionClosedError, ConnectionClosedOK
 from dotenv import load_dotenv
@@ -23,12 +23,35 @@ PC_LAN_IP = os.getenv("PC_LAN_IP", "").strip()
 CAMERA_INDEX = int(os.getenv("CAMERA_INDEX", "0"))
 CAMERA_INDEX_CANDIDATES = os.getenv("CAMERA_INDEX_CANDIDATES", "").strip()
 USE_V4L2 = os.getenv("USE_V4L2", "true").strip().lower() in {"1", "true", "yes", "on"}
+MJPEG_PASSTHROUGH = os.getenv("MJPEG_PASSTHROUGH", "true").strip().lower() in {"1", "true", "yes", "on"}
 FRAME_FPS = float(os.getenv("FRAME_FPS", "12"))
 JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", "60"))
+MIN_JPEG_QUALITY = min(JPEG_QUALITY, int(os.getenv("MIN_JPEG_QUALITY", "30")))
 FRAME_WIDTH = int(os.getenv("FRAME_WIDTH", "640"))
 FRAME_HEIGHT = int(os.getenv("FRAME_HEIGHT", "360"))
 RECONNECT_DELAY_SEC = float(os.getenv("RECONNECT_DELAY_SEC", "3"))
 
+# ws.send() waits in drain() while the socket is above its write limit, so
+# time spent in send is the back-pressure signal. Above this fraction of a
+# frame interval the link counts as congested; below the clear fraction it
+# counts as idle and quality recovers.
+SEND_CONGESTED_FRACTION = 0.5
+SEND_CLEAR_FRACTION = 0.1
+JPEG_QUALITY_STEP_DOWN = 5
+
+# Binary WebSocket message type tags (first byte of the frame).
+VIDEO_FRAME_TAG = b"\x01"
+_MJPG_FOURCC = cv2.VideoWriter_fourcc(*"MJPG")
+
+
+try:
+    from turbojpeg import TJPF_BGR, TJSAMP_420, TurboJPEG
+
+    _TJ: TurboJPEG | None = TurboJPEG()
+except Exception as exc:  # module or libturbojpeg missing
+    _TJ = None
+    print(f"[Camera] TurboJPEG unavailable, using cv2.imencode: {exc}")
+
 
 class SourceAlreadyActiveError(RuntimeError):
     pass
@@ -95,6 +118,9 @@ def _open_camera() -> cv2.VideoCapture:
     for index in candidates:
         capture = cv2.VideoCapture(index, backend_flag) if backend_flag is not None else cv2.VideoCapture(index)
         if capture.isOpened():
+            # Ask for MJPG before sizing: the camera's own encoder does the JPEG
+            # work, and V4L2 only lists the higher MJPG modes under that format.
+            capture.set(cv2.CAP_PROP_FOURCC, float(_MJPG_FOURCC))
             if FRAME_WIDTH > 0:
                 capture.set(cv2.CAP_PROP_FRAME_WIDTH, float(FRAME_WIDTH))
             if FRAME_HEIGHT > 0:
@@ -112,23 +138,53 @@ def _open_camera() -> cv2.VideoCapture:
     )
 
 
-def _encode_frame_to_base64_jpeg(frame) -> str:
+def _enable_mjpeg_passthrough(capture: cv2.VideoCapture) -> bool:
+    """Hand out the camera's MJPG buffers undecoded when the stream allows it.
+
+    Requires V4L2 delivering MJPG at exactly the configured size (no resize
+    needed). With CONVERT_RGB off, retrieve() then returns the compressed
+    frame as a flat byte array, so the Pi never decodes or re-encodes.
+    """
+    if not (MJPEG_PASSTHROUGH and USE_V4L2 and hasattr(cv2, "CAP_V4L2")):
+        return False
+    if int(capture.get(cv2.CAP_PROP_FOURCC)) != _MJPG_FOURCC:
+        return False
+    width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    if (FRAME_WIDTH > 0 and width != FRAME_WIDTH) or (FRAME_HEIGHT > 0 and height != FRAME_HEIGHT):
+        return False
+    if not capture.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+        return False
+
+    ok, raw = capture.read()
+    if ok and raw is not None and raw.size > 2 and raw.ravel()[0] == 0xFF and raw.ravel()[1] == 0xD8:
+        print("[Camera] Forwarding camera MJPG frames without re-encoding")
+        return True
+    capture.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+    return False
+
+
+def _encode_frame_to_jpeg(frame, quality: int = JPEG_QUALITY) -> bytes:
+    if _TJ is not None:
+        # libjpeg-turbo's NEON path, straight from BGR with no colour round trip.
+        return _TJ.encode(frame, quality=quality, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420)
+
     success, buffer = cv2.imencode(
         ".jpg",
         frame,
-        [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY],
+        [int(cv2.IMWRITE_JPEG_QUALITY), quality],
     )
     if not success:
         raise RuntimeError("Failed to encode frame as JPEG")
-    return base64.b64encode(buffer.tobytes()).decode("ascii")
+    return buffer.tobytes()
 
 
 async def _recv_loop(ws: websockets.ClientConnection) -> None:
     warned_audio_drop = False
     async for raw in ws:
         try:
-            message = json.loads(raw)
-        except json.JSONDecodeError:
+            message = orjson.loads(raw)
+        except orjson.JSONDecodeError:
             continue
 
         message_type = message.get("type")
@@ -153,32 +209,74 @@ async def _send_video_loop(ws: websockets.ClientConnection, stop_event: asyncio.
 
     frame_interval = 1.0 / max(FRAME_FPS, 0.1)
     next_send = asyncio.get_running_loop().time()
+    passthrough = _enable_mjpeg_passthrough(capture)
+
+    # Reused every frame: retrieve() decodes into frame_buf once it has the
+    # camera's shape, and resize writes into resized_buf.
+    frame_buf = None
+    resized_buf = (
+        np.empty((FRAME_HEIGHT, FRAME_WIDTH, 3), np.uint8)
+        if FRAME_WIDTH > 0 and FRAME_HEIGHT > 0
+        else None
+    )
+
+    # Congestion control: quality drops while sends block on a full socket
+    # and creeps back once they are quick; frames are skipped when even that
+    # is not enough.
+    quality = JPEG_QUALITY
+    skip_next = False
+    congested_after = frame_interval * SEND_CONGESTED_FRACTION
+    clear_below = frame_interval * SEND_CLEAR_FRACTION
 
     try:
         while not stop_event.is_set():
-            ok, frame = capture.read()
-            if not ok:
+            if not capture.grab():
                 await asyncio.sleep(0.1)
                 continue
+            if skip_next:
+                # Grabbed but never decoded, encoded or sent.
+                skip_next = False
+                continue
 
-            if FRAME_WIDTH > 0 and FRAME_HEIGHT > 0:
-                if frame.shape[1] != FRAME_WIDTH or frame.shape[0] != FRAME_HEIGHT:
-                    frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT), interpolation=cv2.INTER_AREA)
+            ok, frame = capture.retrieve(frame_buf)
+            if not ok or frame is None:
+                await asyncio.sleep(0.1)
+                continue
 
-            payload = {
-                "type": "video",
-                "data": _encode_frame_to_base64_jpeg(frame),
-            }
+            if passthrough:
+                jpg = frame.tobytes()
+            else:
+                frame_buf = frame
+                if resized_buf is not None and frame.shape[:2] != resized_buf.shape[:2]:
+                    frame = cv2.resize(
+                        frame, (FRAME_WIDTH, FRAME_HEIGHT), dst=resized_buf, interpolation=cv2.INTER_AREA
+                    )
+                jpg = _encode_frame_to_jpeg(frame, quality)
+
+            # Raw JPEG in a binary frame: no base64 inflation, no JSON string.
+            send_started = asyncio.get_running_loop().time()
             try:
-                await ws.send(json.dumps(payload))
+                await ws.send(VIDEO_FRAME_TAG + jpg)
             except (ConnectionClosed, ConnectionClosedError, ConnectionClosedOK):
                 break
+            send_time = asyncio.get_running_loop().time() - send_started
+
+            if send_time > congested_after:
+                if passthrough or quality <= MIN_JPEG_QUALITY:
+                    skip_next = True
+                else:
+                    quality = max(MIN_JPEG_QUALITY, quality - JPEG_QUALITY_STEP_DOWN)
+            elif send_time < clear_below and quality < JPEG_QUALITY:
+                quality += 1
 
             next_send += frame_interval
             sleep_for = next_send - asyncio.get_running_loop().time()
             if sleep_for > 0:
                 await asyncio.sleep(sleep_for)
             else:
+                # A full interval behind: drop the next frame to catch up.
+                if sleep_for < -frame_interval:
+                    skip_next = True
                 next_send = asyncio.get_running_loop().time()
     finally:
         capture.release()
@@ -257,4 +355,11 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        print("[Config] uvloop unavailable, using the default asyncio event loop")
+        asyncio.run(main())
+    else:
+        # libuv loop: cheaper ws.send() wakeups for the frame send loop.
+        uvloop.run(main())